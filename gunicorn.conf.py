@@ -0,0 +1,53 @@
+# gunicorn.conf.py -- gunicorn lo carga solo desde el directorio de arranque.
+# Los flags de workers/threads siguen en el startCommand de render.yaml; aquí
+# solo se prepara el almacén multiproceso de métricas y su listener interno
+# (src/api/metrics.py).
+import os
+import shutil
+import tempfile
+
+_metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "specialwash-metrics")
+)
+
+_exporter = None  # servidor HTTP de métricas del master (when_ready)
+
+
+def on_starting(server):
+    # ficheros de un arranque anterior darían contadores falsos
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.makedirs(_metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    global _exporter
+    # sin METRICS_TOKEN, las métricas agregadas de todos los workers solo se
+    # sirven aquí, en un puerto interno (src/api/metrics.py)
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return
+    try:
+        from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+    except ImportError:
+        return
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    addr = os.getenv("METRICS_ADDR", "127.0.0.1")
+    _exporter, _ = start_http_server(int(port), addr=addr, registry=registry)
+    server.log.info("Métricas en http://%s:%s/metrics", addr, port)
+
+
+def post_fork(server, worker):
+    # el socket de escucha del exporter se hereda en el fork: el worker no lo
+    # atiende (el hilo que hace accept solo existe en el master), así que se
+    # cierra su copia para que el puerto sea solo del master
+    if _exporter is not None:
+        _exporter.server_close()
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -45,6 +45,22 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Objetos de búsqueda creados a mano por la migración 1c4d7e9a2b60 y que no
+# están en los modelos: la tabla virtual FTS5 de SQLite con sus tablas
+# sombra y los índices trigram de Postgres. Sin este filtro autogenerate los
+# ve como sobrantes y 'flask db migrate' generaría su DROP.
+SEARCH_TABLE_PREFIX = 'producto_fts'
+SEARCH_INDEXES = {'ix_producto_nombre_trgm', 'ix_producto_categoria_trgm'}
+
+
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return not name.startswith(SEARCH_TABLE_PREFIX)
+    if type_ == 'index':
+        return name not in SEARCH_INDEXES
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +81,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +110,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
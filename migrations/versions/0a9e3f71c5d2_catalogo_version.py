@@ -0,0 +1,33 @@
+"""tabla catalogo_version (contadores para ETag de catálogos)
+
+Revision ID: 0a9e3f71c5d2
+Revises: f2b6c8d0a391
+Create Date: 2026-10-17 12:40:09.671833
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a9e3f71c5d2'
+down_revision = 'f2b6c8d0a391'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalogo_version = op.create_table('catalogo_version',
+    sa.Column('tabla', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('tabla')
+    )
+    op.bulk_insert(catalogo_version, [
+        {'tabla': 'producto', 'version': 1},
+        {'tabla': 'proveedor', 'version': 1},
+        {'tabla': 'maquinaria', 'version': 1},
+    ])
+
+
+def downgrade():
+    op.drop_table('catalogo_version')
@@ -0,0 +1,88 @@
+"""búsqueda de productos: pg_trgm (Postgres) / FTS5 (SQLite)
+
+Revision ID: 1c4d7e9a2b60
+Revises: 0a9e3f71c5d2
+Create Date: 2026-10-17 13:25:44.087316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c4d7e9a2b60'
+down_revision = '0a9e3f71c5d2'
+branch_labels = None
+depends_on = None
+
+
+# unaccent() no es IMMUTABLE y no puede ir en un índice; este envoltorio sí.
+PG_F_UNACCENT = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS
+$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+"""
+
+SQLITE_FTS = [
+    """
+    CREATE VIRTUAL TABLE producto_fts USING fts5(
+        nombre, categoria,
+        content='producto', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER producto_fts_ai AFTER INSERT ON producto BEGIN
+        INSERT INTO producto_fts(rowid, nombre, categoria)
+        VALUES (new.id, new.nombre, new.categoria);
+    END
+    """,
+    """
+    CREATE TRIGGER producto_fts_ad AFTER DELETE ON producto BEGIN
+        INSERT INTO producto_fts(producto_fts, rowid, nombre, categoria)
+        VALUES ('delete', old.id, old.nombre, old.categoria);
+    END
+    """,
+    """
+    CREATE TRIGGER producto_fts_au AFTER UPDATE OF nombre, categoria ON producto BEGIN
+        INSERT INTO producto_fts(producto_fts, rowid, nombre, categoria)
+        VALUES ('delete', old.id, old.nombre, old.categoria);
+        INSERT INTO producto_fts(rowid, nombre, categoria)
+        VALUES (new.id, new.nombre, new.categoria);
+    END
+    """,
+    "INSERT INTO producto_fts(producto_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute(PG_F_UNACCENT)
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_producto_nombre_trgm "
+                "ON producto USING gin (f_unaccent(lower(nombre)) gin_trgm_ops)"
+            )
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_producto_categoria_trgm "
+                "ON producto USING gin (f_unaccent(lower(coalesce(categoria, ''))) gin_trgm_ops)"
+            )
+    elif dialect == 'sqlite':
+        for stmt in SQLITE_FTS:
+            op.execute(stmt)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_producto_categoria_trgm")
+            op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_producto_nombre_trgm")
+        op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+    elif dialect == 'sqlite':
+        for trg in ('producto_fts_au', 'producto_fts_ad', 'producto_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trg}")
+        op.execute("DROP TABLE IF EXISTS producto_fts")
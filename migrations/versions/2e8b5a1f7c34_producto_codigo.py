@@ -0,0 +1,33 @@
+"""producto.codigo (código de barras / SKU) con índice único
+
+Revision ID: 2e8b5a1f7c34
+Revises: 1c4d7e9a2b60
+Create Date: 2026-10-17 14:10:31.552097
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e8b5a1f7c34'
+down_revision = '1c4d7e9a2b60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('producto', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('codigo', sa.String(length=64), nullable=True))
+
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.create_index('ix_producto_codigo', 'producto', ['codigo'], unique=True, postgresql_concurrently=True)
+    else:
+        op.create_index('ix_producto_codigo', 'producto', ['codigo'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_producto_codigo', table_name='producto')
+    with op.batch_alter_table('producto', schema=None) as batch_op:
+        batch_op.drop_column('codigo')
@@ -0,0 +1,46 @@
+"""fecha de entrada/salida con un único formato de texto en SQLite
+
+Revision ID: 3f9c1d2a8b47
+Revises: 2e8b5a1f7c34
+Create Date: 2026-10-17 19:05:12.640311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1d2a8b47'
+down_revision = '2e8b5a1f7c34'
+branch_labels = None
+depends_on = None
+
+# mismo texto que SQLAlchemy escribe para un datetime: 'YYYY-MM-DD HH:MM:SS.ffffff'
+_AHORA = "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+def upgrade():
+    # Solo SQLite: guarda las fechas como texto y CURRENT_TIMESTAMP no lleva
+    # microsegundos, así que el orden de texto no coincidía con el de fecha y
+    # la paginación comparaba julianday(fecha), sin poder usar los índices.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for tabla in ('entrada', 'salida'):
+        for col in ('fecha', 'created_at'):
+            op.execute(f"UPDATE {tabla} SET {col} = {col} || '.000000' WHERE length({col}) = 19")
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.alter_column('fecha', existing_type=sa.DateTime(), server_default=sa.text(_AHORA))
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(), server_default=sa.text(_AHORA))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for tabla in ('salida', 'entrada'):
+        with op.batch_alter_table(tabla, schema=None) as batch_op:
+            batch_op.alter_column('created_at', existing_type=sa.DateTime(),
+                                  server_default=sa.text('(CURRENT_TIMESTAMP)'))
+            batch_op.alter_column('fecha', existing_type=sa.DateTime(),
+                                  server_default=sa.text('(CURRENT_TIMESTAMP)'))
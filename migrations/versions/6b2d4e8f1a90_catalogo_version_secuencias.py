@@ -0,0 +1,38 @@
+"""versiones de catálogo como secuencias en Postgres
+
+Revision ID: 6b2d4e8f1a90
+Revises: 3f9c1d2a8b47
+Create Date: 2026-10-17 19:48:27.310954
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2d4e8f1a90'
+down_revision = '3f9c1d2a8b47'
+branch_labels = None
+depends_on = None
+
+CATALOGOS = ('producto', 'proveedor', 'maquinaria')
+
+
+def upgrade():
+    # Solo Postgres: el UPDATE de la fila de catalogo_version en cada commit
+    # serializaba todas las entradas/salidas. Las secuencias arrancan en la
+    # versión actual + 1 para que ningún ETag ya emitido vuelva a ser válido.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabla in CATALOGOS:
+        seq = f'catalogo_version_{tabla}_seq'
+        op.execute(f'CREATE SEQUENCE IF NOT EXISTS {seq}')
+        op.execute(
+            f"SELECT setval('{seq}', COALESCE((SELECT version FROM catalogo_version WHERE tabla = '{tabla}'), 0) + 1)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for tabla in CATALOGOS:
+        op.execute(f'DROP SEQUENCE IF EXISTS catalogo_version_{tabla}_seq')
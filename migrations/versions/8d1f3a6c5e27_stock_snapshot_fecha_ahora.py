@@ -0,0 +1,39 @@
+"""fecha de stock_snapshot con el mismo formato UTC que entrada/salida en SQLite
+
+Revision ID: 8d1f3a6c5e27
+Revises: 6b2d4e8f1a90
+Create Date: 2026-10-17 21:40:03.118524
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d1f3a6c5e27'
+down_revision = '6b2d4e8f1a90'
+branch_labels = None
+depends_on = None
+
+# mismo texto que SQLAlchemy escribe para un datetime: 'YYYY-MM-DD HH:MM:SS.ffffff'
+_AHORA = "(strftime('%Y-%m-%d %H:%M:%f000', 'now'))"
+
+
+def upgrade():
+    # Solo SQLite: con CURRENT_TIMESTAMP las fotos quedaban sin microsegundos y
+    # stock_at las comparaba como texto contra fechas con ellos.
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("UPDATE stock_snapshot SET fecha = fecha || '.000000' WHERE length(fecha) = 19")
+    with op.batch_alter_table('stock_snapshot', schema=None) as batch_op:
+        batch_op.alter_column('fecha', existing_type=sa.DateTime(), server_default=sa.text(_AHORA))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    with op.batch_alter_table('stock_snapshot', schema=None) as batch_op:
+        batch_op.alter_column('fecha', existing_type=sa.DateTime(),
+                              server_default=sa.text('(CURRENT_TIMESTAMP)'))
@@ -0,0 +1,50 @@
+"""backfill fecha en entrada/salida y server_default now()
+
+Revision ID: c7d2e1a4f9b0
+Revises: b3abd6e9b61d
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2e1a4f9b0'
+down_revision = 'b3abd6e9b61d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # El esquema base creó 'fecha' sin server_default, así que las filas
+    # insertadas sin fecha explícita la tienen a NULL. Se rellena con
+    # created_at para que los filtros/orden por fecha (y sus índices) valgan.
+    op.execute("UPDATE salida SET fecha = created_at WHERE fecha IS NULL")
+    op.execute("UPDATE entrada SET fecha = created_at WHERE fecha IS NULL")
+
+    with op.batch_alter_table('salida', schema=None) as batch_op:
+        batch_op.alter_column('fecha',
+               existing_type=sa.DateTime(),
+               server_default=sa.text('(CURRENT_TIMESTAMP)'),
+               existing_nullable=True)
+
+    with op.batch_alter_table('entrada', schema=None) as batch_op:
+        batch_op.alter_column('fecha',
+               existing_type=sa.DateTime(),
+               server_default=sa.text('(CURRENT_TIMESTAMP)'),
+               existing_nullable=True)
+
+
+def downgrade():
+    with op.batch_alter_table('entrada', schema=None) as batch_op:
+        batch_op.alter_column('fecha',
+               existing_type=sa.DateTime(),
+               server_default=None,
+               existing_nullable=True)
+
+    with op.batch_alter_table('salida', schema=None) as batch_op:
+        batch_op.alter_column('fecha',
+               existing_type=sa.DateTime(),
+               server_default=None,
+               existing_nullable=True)
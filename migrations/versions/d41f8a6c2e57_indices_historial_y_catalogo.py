@@ -0,0 +1,58 @@
+"""índices para filtros y orden de historiales y catálogo
+
+Revision ID: d41f8a6c2e57
+Revises: c7d2e1a4f9b0
+Create Date: 2026-10-17 09:31:05.540771
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f8a6c2e57'
+down_revision = 'c7d2e1a4f9b0'
+branch_labels = None
+depends_on = None
+
+
+# (nombre, tabla, columnas) -- deben coincidir con __table_args__ en models.py
+INDICES = [
+    # salidas_historial / salidas_list: orden (fecha, id), filtro por usuario y producto
+    ('ix_salida_fecha_id', 'salida', ['fecha', 'id']),
+    ('ix_salida_usuario_fecha', 'salida', ['usuario_id', 'fecha', 'id']),
+    ('ix_salida_producto_fecha', 'salida', ['producto_id', 'fecha', 'id']),
+    # entradas_list: orden (fecha, id), filtro por proveedor; producto para joins/agregados
+    ('ix_entrada_fecha_id', 'entrada', ['fecha', 'id']),
+    ('ix_entrada_proveedor_fecha', 'entrada', ['proveedor_id', 'fecha', 'id']),
+    ('ix_entrada_producto_fecha', 'entrada', ['producto_id', 'fecha']),
+    # productos_list: filtro por categoría y orden por nombre
+    ('ix_producto_categoria_nombre', 'producto', ['categoria', 'nombre']),
+    ('ix_producto_nombre', 'producto', ['nombre']),
+]
+
+
+def _is_postgres():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if _is_postgres():
+        # CREATE INDEX CONCURRENTLY no bloquea escrituras, pero no puede ir
+        # dentro de una transacción.
+        with op.get_context().autocommit_block():
+            for name, table, cols in INDICES:
+                op.create_index(name, table, cols, unique=False, postgresql_concurrently=True)
+    else:
+        for name, table, cols in INDICES:
+            op.create_index(name, table, cols, unique=False)
+
+
+def downgrade():
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            for name, table, _cols in reversed(INDICES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        for name, table, _cols in reversed(INDICES):
+            op.drop_index(name, table_name=table)
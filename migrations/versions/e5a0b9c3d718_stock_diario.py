@@ -0,0 +1,45 @@
+"""tabla stock_diario (agregado diario de entradas/salidas)
+
+Revision ID: e5a0b9c3d718
+Revises: d41f8a6c2e57
+Create Date: 2026-10-17 11:02:17.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a0b9c3d718'
+down_revision = 'd41f8a6c2e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_diario',
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('dia', sa.Date(), nullable=False),
+    sa.Column('entradas', sa.Integer(), nullable=False),
+    sa.Column('salidas', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ),
+    sa.PrimaryKeyConstraint('producto_id', 'dia')
+    )
+    op.create_index('ix_stock_diario_dia', 'stock_diario', ['dia'], unique=False)
+
+    # carga inicial desde el histórico (equivale a `flask rebuild-stock-diario`)
+    op.execute("""
+        INSERT INTO stock_diario (producto_id, dia, entradas, salidas)
+        SELECT producto_id, date(fecha), sum(e), sum(s)
+        FROM (
+            SELECT producto_id, fecha, cantidad AS e, 0 AS s FROM entrada
+            UNION ALL
+            SELECT producto_id, fecha, 0 AS e, cantidad AS s FROM salida
+        ) m
+        GROUP BY producto_id, date(fecha)
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_stock_diario_dia', table_name='stock_diario')
+    op.drop_table('stock_diario')
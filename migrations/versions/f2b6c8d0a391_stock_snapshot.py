@@ -0,0 +1,33 @@
+"""tabla stock_snapshot (fotos periódicas de stock)
+
+Revision ID: f2b6c8d0a391
+Revises: e5a0b9c3d718
+Create Date: 2026-10-17 11:48:52.230419
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6c8d0a391'
+down_revision = 'e5a0b9c3d718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('producto_id', sa.Integer(), nullable=False),
+    sa.Column('fecha', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['producto_id'], ['producto.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_stock_snapshot_producto_fecha', 'stock_snapshot', ['producto_id', 'fecha'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_snapshot_producto_fecha', table_name='stock_snapshot')
+    op.drop_table('stock_snapshot')
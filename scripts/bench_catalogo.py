@@ -0,0 +1,120 @@
+"""
+Benchmark de los catálogos (GET /productos, /usuarios, /proveedores).
+
+Siembra una SQLite temporal con productos y un historial de movimientos
+grande, y mide latencia media, sentencias SQL y pico de memoria por endpoint.
+Sirve para comparar estrategias de carga de relaciones entre commits.
+
+Uso:
+    python scripts/bench_catalogo.py [--productos 200] [--movimientos 50000] [--repeticiones 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+def build_app(db_path):
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, SRC)
+    from app import app
+    return app
+
+
+def seed(app, n_productos, n_movimientos):
+    from api.models import db, User, Producto, Proveedor, Entrada, Salida
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [
+            {"nombre": f"Empleado {i}", "email": f"e{i}@bench.sw", "rol": "empleado",
+             "password_hash": "x", "activo": True}
+            for i in range(1, 21)
+        ])
+        db.session.execute(Proveedor.__table__.insert(), [
+            {"nombre": f"Proveedor {i}"} for i in range(1, 21)
+        ])
+        db.session.execute(Producto.__table__.insert(), [
+            {"nombre": f"Producto {i:05d}", "categoria": f"Cat {i % 10}",
+             "stock_minimo": 5, "stock_actual": 1000}
+            for i in range(1, n_productos + 1)
+        ])
+        mitad = n_movimientos // 2
+        db.session.execute(Entrada.__table__.insert(), [
+            {"producto_id": 1 + i % n_productos, "proveedor_id": 1 + i % 20, "cantidad": 1}
+            for i in range(mitad)
+        ])
+        db.session.execute(Salida.__table__.insert(), [
+            {"producto_id": 1 + i % n_productos, "usuario_id": 1 + i % 20, "cantidad": 1}
+            for i in range(n_movimientos - mitad)
+        ])
+        db.session.commit()
+
+
+def admin_headers(app):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity="1", additional_claims={"rol": "administrador"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def measure(app, client, headers, url, repeticiones):
+    from sqlalchemy import event
+    from api.models import db
+
+    with app.app_context():
+        engine = db.engine
+    n_sql = [0]
+
+    def _count(*_args):
+        n_sql[0] += 1
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        client.get(url, headers=headers)  # calentamiento
+        n_sql[0] = 0
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            resp = client.get(url, headers=headers)
+            assert resp.status_code == 200, (url, resp.status_code)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    return {
+        "ms": elapsed * 1000 / repeticiones,
+        "sql": n_sql[0] / repeticiones,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--productos", type=int, default=200)
+    parser.add_argument("--movimientos", type=int, default=50000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sw-bench-"), "bench.db")
+    app = build_app(db_path)
+    seed(app, args.productos, args.movimientos)
+    client = app.test_client()
+    headers = admin_headers(app)
+
+    print(f"{args.productos} productos, {args.movimientos} movimientos, {args.repeticiones} repeticiones")
+    print(f"{'endpoint':<20}{'ms/req':>10}{'sql/req':>10}{'pico KB':>12}")
+    for url in ("/api/productos", "/api/usuarios", "/api/proveedores"):
+        r = measure(app, client, headers, url, args.repeticiones)
+        print(f"{url:<20}{r['ms']:>10.2f}{r['sql']:>10.1f}{r['peak_kb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark del proveedor JSON: stdlib json frente a orjson sobre GET /salidas.
+
+Siembra una SQLite temporal y mide, con cada proveedor, la latencia media y
+el tiempo de CPU por petición del listado completo de salidas, más el coste
+de serializar solo el payload (sin consulta ni ORM).
+
+Uso:
+    python scripts/bench_json.py [--movimientos 20000] [--repeticiones 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from bench_catalogo import build_app, seed, admin_headers
+
+
+def _run(client, headers, url, repeticiones):
+    client.get(url, headers=headers)  # calentamiento
+    t0, c0 = time.perf_counter(), time.process_time()
+    for _ in range(repeticiones):
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200, resp.status_code
+    wall, cpu = time.perf_counter() - t0, time.process_time() - c0
+    return wall * 1000 / repeticiones, cpu * 1000 / repeticiones, len(resp.data)
+
+
+def _dumps_only(app, repeticiones):
+    from api.models import Salida
+
+    with app.test_request_context():
+        payload = [s.to_dict() for s in Salida.query.all()]
+        t0 = time.perf_counter()
+        for _ in range(repeticiones):
+            app.json.response(payload)
+    return (time.perf_counter() - t0) * 1000 / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--movimientos", type=int, default=20000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sw-bench-"), "bench.db")
+    app = build_app(db_path)
+    seed(app, n_productos=200, n_movimientos=args.movimientos * 2)
+    client = app.test_client()
+    headers = admin_headers(app)
+
+    from api.json_provider import IsoJSONProvider, OrjsonProvider, orjson
+
+    proveedores = [("stdlib", IsoJSONProvider(app))]
+    if orjson is not None:
+        proveedores.append(("orjson", OrjsonProvider(app)))
+    else:
+        print("orjson no está instalado: solo se mide stdlib")
+
+    print(f"GET /api/salidas con {args.movimientos} filas, {args.repeticiones} repeticiones")
+    print(f"{'proveedor':<12}{'ms/req':>10}{'cpu ms/req':>12}{'dumps ms':>10}{'KB':>10}")
+    for nombre, provider in proveedores:
+        app.json = provider
+        ms, cpu, size = _run(client, headers, "/api/salidas", args.repeticiones)
+        dumps_ms = _dumps_only(app, args.repeticiones)
+        print(f"{nombre:<12}{ms:>10.1f}{cpu:>12.1f}{dumps_ms:>10.1f}{size / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: N llamadas a POST /registro-salida frente a un POST /registro-salida/lote.
+
+Uso:
+    python scripts/bench_salidas_lote.py [--lineas 50] [--rondas 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from bench_catalogo import build_app, seed, admin_headers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lineas", type=int, default=50)
+    parser.add_argument("--rondas", type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="sw-bench-"), "bench.db")
+    app = build_app(db_path)
+    seed(app, n_productos=200, n_movimientos=10000)
+    client = app.test_client()
+    headers = admin_headers(app)
+
+    lineas = [{"producto_id": 1 + i % 200, "cantidad": 1} for i in range(args.lineas)]
+
+    t0 = time.perf_counter()
+    for _ in range(args.rondas):
+        for ln in lineas:
+            resp = client.post("/api/registro-salida", json=ln, headers=headers)
+            assert resp.status_code == 201, resp.get_json()
+    t_single = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(args.rondas):
+        resp = client.post("/api/registro-salida/lote", json={"lineas": lineas}, headers=headers)
+        assert resp.status_code == 201, resp.get_json()
+    t_lote = time.perf_counter() - t0
+
+    total = args.lineas * args.rondas
+    print(f"{total} salidas ({args.rondas} rondas de {args.lineas} líneas)")
+    print(f"{'modo':<12}{'s total':>10}{'salidas/s':>12}")
+    print(f"{'individual':<12}{t_single:>10.2f}{total / t_single:>12.0f}")
+    print(f"{'lote':<12}{t_lote:>10.2f}{total / t_lote:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
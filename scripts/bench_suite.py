@@ -0,0 +1,324 @@
+"""
+Suite de benchmark de la API: todas las rutas de api/routes.py contra una base sembrada.
+
+Crea el esquema con las migraciones (igual que producción), siembra volumen
+con api/seed.py y mide por caso la latencia (p50/p95), las sentencias SQL
+por petición y el pico de memoria (tracemalloc, en una pasada aparte). Los
+resultados se comparan con la línea base guardada (bench_baseline.json,
+una entrada por motor) y el script sale con código 1 si hay regresiones:
+más sentencias SQL que la base, o un p50 por encima de la tolerancia que
+se repite al volver a medir el caso.
+Avisa también si alguna ruta del blueprint no tiene caso.
+
+Uso:
+    python scripts/bench_suite.py [--db-url postgresql://localhost/sw_bench]
+        [--productos 1000] [--salidas 100000] [--repeticiones 10]
+        [--guardar-baseline] [--tolerancia 0.3]
+
+Sin --db-url usa una SQLite temporal. Con Postgres la base debe existir y
+estar vacía.
+
+Solo se compara contra una línea base del mismo motor y la misma escala
+(--productos/--salidas/--repeticiones): si falta o es de otra escala el
+script lo dice y sale con código 2 sin dar el resultado por bueno. Para
+crearla o actualizarla, --guardar-baseline con esos mismos parámetros.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+BASELINE = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+RUIDO_MS = 2.0  # diferencias por debajo de esto no cuentan como regresión (jitter de rutas rápidas)
+
+
+def build_app(db_url):
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("ACCESS_LOG_SAMPLE", "0")  # solo errores en el access log
+    sys.path.insert(0, SRC)
+    from app import app
+    return app
+
+
+def preparar(app, n_productos, n_salidas):
+    from flask_migrate import upgrade
+    from flask_jwt_extended import create_access_token
+    from werkzeug.security import generate_password_hash
+    from api.models import db, User
+    from api import seed
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        admin = User(nombre="Admin Bench", email="admin@bench.sw", rol="administrador",
+                     password_hash=generate_password_hash("bench"))
+        db.session.add(admin)
+        db.session.commit()
+        seed.seed_load(productos=n_productos, proveedores=max(n_productos // 25, 5), usuarios=20,
+                       salidas=n_salidas, anios=3, log=lambda _msg: None)
+        emp = User.query.filter_by(email="seed1@seed.sw").one()
+        return {
+            "admin": {"Authorization": "Bearer " + create_access_token(
+                identity=str(admin.id), additional_claims={"rol": "administrador"})},
+            "empleado": {"Authorization": "Bearer " + create_access_token(
+                identity=str(emp.id), additional_claims={"rol": emp.rol})},
+        }
+
+
+def casos(app):
+    """
+    (nombre, método, rol, prep) donde prep() -> (url, kwargs del cliente).
+    prep se ejecuta fuera del cronómetro (crea lo que el caso borra, etc.).
+    """
+    from api.models import db, User, Proveedor, Producto, Maquinaria
+
+    hoy = datetime.now().date()
+    mes = f"desde={hoy - timedelta(days=30)}&hasta={hoy}"
+    hace_un_anio = (datetime.now() - timedelta(days=365)).replace(microsecond=0).isoformat()
+    seq = iter(range(10**9))
+
+    def fijo(url, **kw):
+        return lambda: (url, kw)
+
+    def crear(model, **campos):
+        with app.app_context():
+            obj = model(**campos)
+            db.session.add(obj)
+            db.session.commit()
+            return obj.id
+
+    csv_lineas = "producto_id,cantidad,proveedor_id\n" + "".join(
+        f"{1 + i % 50},{1 + i % 7},1\n" for i in range(1000)
+    )
+
+    return [
+        # --- auth ---
+        ("signup", "POST", None, lambda: ("/api/signup", {"json": {
+            "nombre": "Bench", "email": f"signup{next(seq)}@bench.sw", "password": "x"}})),
+        ("login", "POST", None, fijo("/api/auth/login_json", json={"email": "admin@bench.sw", "password": "bench"})),
+        ("me", "GET", "empleado", fijo("/api/auth/me")),
+        ("logout", "POST", None, fijo("/api/auth/logout")),
+        ("hello", "GET", None, fijo("/api/hello")),
+        # --- usuarios ---
+        ("usuarios", "GET", "admin", fijo("/api/usuarios")),
+        ("usuarios POST", "POST", "admin", lambda: ("/api/usuarios", {"json": {
+            "nombre": "Bench", "email": f"u{next(seq)}@bench.sw", "password": "x"}})),
+        ("usuarios PUT", "PUT", "admin", fijo("/api/usuarios/2", json={"nombre": "Empleado 1"})),
+        ("usuarios DELETE", "DELETE", "admin", lambda: (
+            f"/api/usuarios/{crear(User, nombre='B', email=f'd{next(seq)}@bench.sw', rol='empleado', password_hash='x')}", {})),
+        # --- proveedores ---
+        ("proveedores", "GET", "admin", fijo("/api/proveedores")),
+        ("proveedores POST", "POST", "admin", fijo("/api/proveedores", json={"nombre": "Proveedor bench"})),
+        ("proveedores PUT", "PUT", "admin", fijo("/api/proveedores/1", json={"telefono": "900000000"})),
+        ("proveedores DELETE", "DELETE", "admin", lambda: (
+            f"/api/proveedores/{crear(Proveedor, nombre='Borrar')}", {})),
+        # --- productos ---
+        ("productos", "GET", "admin", fijo("/api/productos")),
+        ("productos q", "GET", "admin", fijo("/api/productos?q=deterg")),
+        ("productos bajo_stock", "GET", "admin", fijo("/api/productos?categoria=Químicos&bajo_stock=1")),
+        ("productos fields", "GET", "admin", fijo("/api/productos?fields=id,nombre,stock_actual")),
+        ("productos suggest", "GET", "empleado", fijo("/api/productos/suggest?prefix=det")),
+        ("productos by-code", "GET", "empleado", fijo("/api/productos/by-code/SW00000001")),
+        ("productos stock at", "GET", "admin", fijo(f"/api/productos/1/stock?at={hace_un_anio}")),
+        ("productos POST", "POST", "admin", fijo("/api/productos", json={"nombre": "Producto bench", "stock_actual": 10})),
+        ("productos PUT", "PUT", "admin", fijo("/api/productos/2", json={"stock_minimo": 5})),
+        ("productos PATCH", "PATCH", "admin", fijo("/api/productos/2", json={"categoria": "Químicos"})),
+        ("productos DELETE", "DELETE", "admin", lambda: (
+            f"/api/productos/{crear(Producto, nombre='Borrar', stock_minimo=0, stock_actual=0)}", {})),
+        # --- entradas ---
+        ("entrada POST", "POST", "admin", fijo("/api/registro-entrada", json={
+            "producto_id": 1, "proveedor_id": 1, "cantidad": 100})),
+        ("entrada import 1000", "POST", "admin", fijo(
+            "/api/registro-entrada/import", data=csv_lineas, content_type="text/csv")),
+        ("entradas page", "GET", "admin", fijo("/api/registro-entrada?limit=50")),
+        ("entradas mes", "GET", "admin", fijo(f"/api/registro-entrada?{mes}")),
+        ("entradas export mes", "GET", "admin", fijo(f"/api/registro-entrada/export?{mes}")),
+        # --- salidas ---
+        ("salida POST", "POST", "empleado", fijo("/api/registro-salida", json={"producto_id": 1, "cantidad": 1})),
+        ("salida lote 50", "POST", "admin", fijo("/api/registro-salida/lote", json={
+            "lineas": [{"producto_id": 1 + i, "cantidad": 1} for i in range(50)]})),
+        ("registro-salida page", "GET", "empleado", fijo("/api/registro-salida?limit=50")),
+        ("salidas page", "GET", "admin", fijo("/api/salidas?limit=50")),
+        ("salidas producto", "GET", "admin", fijo("/api/salidas?limit=50&producto_id=1")),
+        ("salidas mes", "GET", "admin", fijo(f"/api/salidas?{mes}")),
+        ("salidas fields mes", "GET", "admin", fijo(f"/api/salidas?{mes}&fields=fecha,producto_nombre,cantidad")),
+        ("salidas export mes", "GET", "admin", fijo(f"/api/salidas/export?{mes}")),
+        # --- stock ---
+        ("conciliacion", "GET", "admin", fijo("/api/stock/conciliacion")),
+        ("conciliacion POST", "POST", "admin", fijo("/api/stock/conciliacion")),
+        ("consumo mes", "GET", "admin", fijo("/api/consumo?agrupar=mes")),
+        # --- maquinaria ---
+        ("maquinaria POST", "POST", "admin", fijo("/api/maquinaria", json={"nombre": "Túnel bench"})),
+        ("maquinaria", "GET", "admin", fijo("/api/maquinaria")),
+        ("maquinaria PUT", "PUT", "admin", fijo("/api/maquinaria/1", json={"estado": "operativa"})),
+        ("maquinaria DELETE", "DELETE", "admin", lambda: (
+            f"/api/maquinaria/{crear(Maquinaria, nombre='Borrar')}", {})),
+        ("cache stats", "GET", "admin", fijo("/api/cache/stats")),
+    ]
+
+
+def cobertura(app, lista):
+    """Endpoints del blueprint api sin ningún caso."""
+    adapter = app.url_map.bind("localhost")
+    cubiertos = set()
+    for _nombre, metodo, _rol, prep in lista:
+        url = prep()[0].split("?")[0]
+        endpoint, _args = adapter.match(url, method=metodo)
+        cubiertos.add((endpoint, metodo))
+    faltan = []
+    for rule in app.url_map.iter_rules():
+        if not rule.endpoint.startswith("api."):
+            continue
+        for m in rule.methods - {"HEAD", "OPTIONS"}:
+            if (rule.endpoint, m) not in cubiertos:
+                faltan.append(f"{m} {rule.rule}")
+    return sorted(faltan)
+
+
+def medir(app, client, headers, caso, repeticiones):
+    from sqlalchemy import event
+    from api.models import db
+
+    _nombre, metodo, rol, prep = caso
+    hdrs = headers.get(rol, {}) if rol else {}
+    with app.app_context():
+        engine = db.engine
+    n_sql = [0]
+
+    def _count(*_args):
+        n_sql[0] += 1
+
+    def una():
+        url, kw = prep()
+        kw = dict(kw, headers=hdrs)
+        n0 = n_sql[0]
+        gc.collect()  # sin basura de la petición anterior: menos varianza entre medidas
+        t0 = time.perf_counter()
+        resp = client.open(url, method=metodo, **kw)
+        resp.get_data()  # los exports van en streaming
+        dt = time.perf_counter() - t0
+        assert resp.status_code < 400, (metodo, url, resp.status_code, resp.get_data()[:200])
+        return dt, n_sql[0] - n0
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        una()  # calentamiento
+        tiempos, sqls = [], []
+        for _ in range(repeticiones):
+            dt, n = una()
+            tiempos.append(dt * 1000)
+            sqls.append(n)
+        tracemalloc.start()
+        una()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    tiempos.sort()
+    return {
+        "p50_ms": round(statistics.median(tiempos), 2),
+        "p95_ms": round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))], 2),
+        "sql": round(statistics.mean(sqls), 1),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+def comparar(actual, base, tolerancia):
+    """Devuelve (texto de la columna delta, es_regresión)."""
+    if not base:
+        return "nuevo", False
+    d_ms = actual["p50_ms"] - base["p50_ms"]
+    pct = d_ms / base["p50_ms"] * 100 if base["p50_ms"] else 0.0
+    regresion_ms = d_ms > RUIDO_MS and actual["p50_ms"] > base["p50_ms"] * (1 + tolerancia)
+    regresion_sql = actual["sql"] > base["sql"]
+    marca = " <-- REGRESIÓN" if (regresion_ms or regresion_sql) else ""
+    sql_txt = f" sql {base['sql']:g}->{actual['sql']:g}" if actual["sql"] != base["sql"] else ""
+    return f"{pct:+.0f}%{sql_txt}{marca}", regresion_ms or regresion_sql
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db-url", help="Por defecto, una SQLite temporal.")
+    parser.add_argument("--productos", type=int, default=1000)
+    parser.add_argument("--salidas", type=int, default=100000)
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--guardar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.3, help="Margen de latencia p50 (0.3 = +30%%).")
+    parser.add_argument("--solo", help="Solo los casos cuyo nombre contenga este texto.")
+    args = parser.parse_args()
+
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="sw-bench-"), "bench.db")
+    app = build_app(db_url)
+    motor = db_url.split(":", 1)[0].split("+", 1)[0]
+
+    t0 = time.perf_counter()
+    headers = preparar(app, args.productos, args.salidas)
+    print(f"{motor}: {args.productos} productos, {args.salidas} salidas "
+          f"(sembrado en {time.perf_counter() - t0:.0f} s), {args.repeticiones} repeticiones")
+
+    lista = casos(app)
+    for falta in cobertura(app, lista):
+        print(f"AVISO: ruta sin caso en la suite: {falta}")
+    if args.solo:
+        lista = [c for c in lista if args.solo in c[0]]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    escala = {"productos": args.productos, "salidas": args.salidas, "repeticiones": args.repeticiones}
+    guardada = baseline.get(motor)
+    problema = None
+    if not guardada:
+        problema = f"no hay línea base de {motor} en {args.baseline}"
+    elif guardada.get("escala") != escala:
+        problema = f"la línea base de {motor} es de otra escala ({guardada.get('escala')}, esta ejecución {escala})"
+    base = guardada.get("casos", {}) if guardada and not problema else {}
+    if problema and not args.guardar_baseline:
+        print(f"AVISO: {problema}; se mide pero no se compara")
+
+    client = app.test_client()
+    resultados = {}
+    regresiones = 0
+    print(f"{'caso':<24}{'p50 ms':>9}{'p95 ms':>9}{'sql':>7}{'pico KB':>9}  vs baseline")
+    for caso in lista:
+        b = base.get(caso[0])
+        r = medir(app, client, headers, caso, args.repeticiones)
+        delta, reg = comparar(r, b, args.tolerancia)
+        if reg and r["sql"] <= b["sql"] and caso[1] == "GET":
+            # solo latencia: se vuelve a medir una vez antes de darla por
+            # buena, para no fallar por un pico puntual de la máquina. Solo
+            # lecturas: repetir una escritura cambia los datos de los casos
+            # siguientes.
+            r = min(r, medir(app, client, headers, caso, args.repeticiones), key=lambda x: x["p50_ms"])
+            delta, reg = comparar(r, b, args.tolerancia)
+            delta += " (remedido)"
+        resultados[caso[0]] = r
+        regresiones += reg
+        print(f"{caso[0]:<24}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['sql']:>7g}{r['peak_kb']:>9}  {delta}")
+
+    if args.guardar_baseline:
+        baseline[motor] = {"escala": escala, "casos": resultados}
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2, ensure_ascii=False, sort_keys=True)
+            fh.write("\n")
+        print(f"Línea base guardada en {args.baseline} ({motor})")
+    elif problema:
+        print(f"SIN COMPARACIÓN: {problema}. Repite con la escala de la línea base o usa --guardar-baseline.")
+        sys.exit(2)
+    elif regresiones:
+        print(f"{regresiones} casos con regresión respecto a la línea base")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Prueba de estrés de escrituras concurrentes: entradas y salidas contra los mismos productos.
+
+Lanza --procesos procesos con --hilos hilos cada uno. Por defecto cada
+proceso carga la app WSGI real y la ataca con su test client, como un worker
+de gunicorn. Con --url las peticiones van por HTTP a un servidor ya
+arrancado; en ese caso hace falta --db-url de su misma base y el mismo
+JWT_SECRET_KEY.
+
+La mayoría de peticiones van a unos pocos productos "calientes" (máxima
+contención). Se mide:
+- throughput y latencia por tipo (p50/p95/p99);
+- rechazos por stock (4xx) y errores (5xx), clasificando interbloqueos
+  (deadlock) y bases bloqueadas (database is locked);
+- tiempo en las sentencias que bloquean la fila de producto (SELECT ... FOR
+  UPDATE y UPDATE producto), como aproximación a la espera por locks. Solo
+  se mide en modo proceso.
+
+Al terminar se verifica:
+- stock_actual == entradas - salidas en todo el catálogo;
+- ningún stock negativo;
+- las filas nuevas del libro coinciden con las peticiones aceptadas;
+- stock_diario cuadra con el libro.
+Si algo falla, sale con código 1, tanto en SQLite como en Postgres.
+
+Uso:
+    python scripts/stress_movimientos.py [--peticiones 4000] [--procesos 4] [--hilos 8]
+        [--db-url postgresql://localhost/sw_stress] [--url http://127.0.0.1:3001]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+
+
+def build_app(db_url):
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("ACCESS_LOG_SAMPLE", "0")
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+    from app import app
+    return app
+
+
+# ==========================
+# Preparación y verificación (proceso principal)
+# ==========================
+def preparar(app, n_productos, stock_inicial, n_empleados):
+    from flask_migrate import upgrade
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import select, update
+    from api.models import db, User, Producto, Entrada
+    from api import stock_diario
+
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        if db.session.execute(select(Producto.id).limit(1)).first():
+            raise SystemExit("La base ya tiene productos: usar una vacía")
+        db.session.execute(User.__table__.insert(), [
+            {"nombre": "Admin Stress", "email": "admin@stress.sw", "rol": "administrador",
+             "password_hash": "x", "activo": True},
+        ] + [
+            {"nombre": f"Empleado {i}", "email": f"e{i}@stress.sw", "rol": "empleado",
+             "password_hash": "x", "activo": True}
+            for i in range(1, n_empleados + 1)
+        ])
+        db.session.execute(Producto.__table__.insert(), [
+            {"nombre": f"Producto {i:03d}", "categoria": "Stress", "stock_minimo": 0, "stock_actual": 0}
+            for i in range(1, n_productos + 1)
+        ])
+        pids = [pid for pid, in db.session.execute(select(Producto.id).order_by(Producto.id))]
+        db.session.execute(Entrada.__table__.insert(), [
+            {"producto_id": pid, "cantidad": stock_inicial, "numero_albaran": "STOCK INICIAL"} for pid in pids
+        ])
+        db.session.execute(update(Producto.__table__).values(stock_actual=stock_inicial))
+        db.session.commit()
+        stock_diario.rebuild()
+
+        usuarios = db.session.execute(select(User.id, User.rol).order_by(User.id)).all()
+        tokens = {
+            "admin": [create_access_token(identity=str(uid), additional_claims={"rol": rol})
+                      for uid, rol in usuarios if rol == "administrador"],
+            "empleado": [create_access_token(identity=str(uid), additional_claims={"rol": rol})
+                         for uid, rol in usuarios if rol == "empleado"],
+        }
+        return pids, tokens
+
+
+def contar_libro(app):
+    from sqlalchemy import func, select
+    from api.models import db, Entrada, Salida
+
+    with app.app_context():
+        return (
+            db.session.execute(select(func.count()).select_from(Entrada)).scalar(),
+            db.session.execute(select(func.count()).select_from(Salida)).scalar(),
+        )
+
+
+def verificar(app, libro_antes, aceptadas):
+    """Lista de fallos (vacía si todo cuadra)."""
+    from sqlalchemy import func, select
+    from api.models import db, Producto, Entrada, Salida, StockDiario
+    from api import reconcile
+
+    fallos = []
+    with app.app_context():
+        db.session.expire_all()
+        for it in reconcile.drift():
+            fallos.append(f"producto {it['producto_id']}: stock_actual={it['stock_actual']} "
+                          f"libro={it['ledger']} ({it['diferencia']:+d})")
+        negativos = db.session.execute(
+            select(func.count()).select_from(Producto).where(Producto.stock_actual < 0)
+        ).scalar()
+        if negativos:
+            fallos.append(f"{negativos} productos con stock negativo")
+
+        ent, sal = contar_libro(app)
+        esperadas_ent = libro_antes[0] + aceptadas["entrada"]
+        esperadas_sal = libro_antes[1] + aceptadas["salida"] + aceptadas["lineas_lote"]
+        if ent != esperadas_ent:
+            fallos.append(f"entradas en el libro {ent}, esperadas {esperadas_ent}")
+        if sal != esperadas_sal:
+            fallos.append(f"salidas en el libro {sal}, esperadas {esperadas_sal}")
+
+        for model, col in ((Entrada, StockDiario.entradas), (Salida, StockDiario.salidas)):
+            libro = db.session.execute(select(func.coalesce(func.sum(model.cantidad), 0))).scalar()
+            diario = db.session.execute(select(func.coalesce(func.sum(col), 0))).scalar()
+            if libro != diario:
+                fallos.append(f"stock_diario.{col.key}={diario} y el libro suma {libro}")
+    return fallos
+
+
+# ==========================
+# Carga (procesos hijo)
+# ==========================
+class _ClienteWSGI:
+    def __init__(self, app):
+        self._c = app.test_client()
+
+    def post(self, path, body, token):
+        r = self._c.post(path, json=body, headers={"Authorization": f"Bearer {token}"})
+        return r.status_code, r.get_data()
+
+
+class _ClienteHTTP:
+    def __init__(self, url):
+        u = urlparse(url)
+        self._conn = HTTPConnection(u.hostname, u.port or 80, timeout=60)
+
+    def post(self, path, body, token):
+        self._conn.request("POST", path, body=json.dumps(body), headers={
+            "Authorization": f"Bearer {token}", "Content-Type": "application/json"})
+        r = self._conn.getresponse()
+        return r.status, r.read()
+
+
+def _clasificar(texto):
+    t = texto.lower()
+    if "deadlock" in t:
+        return "deadlock"
+    if "database is locked" in t or "lock timeout" in t or "could not obtain lock" in t:
+        return "locked"
+    if "could not serialize" in t:
+        return "serialization"
+    return "otro"
+
+
+def _worker(args):
+    (idx, n, cfg) = args
+    rng = random.Random(cfg["semilla"] * 1000 + idx)
+    errores_srv = Counter()
+    lock_times = []
+    lock_mutex = threading.Lock()
+
+    if cfg["url"]:
+        nuevo_cliente = lambda: _ClienteHTTP(cfg["url"])  # noqa: E731
+    else:
+        app = build_app(cfg["db_url"])
+        logging.getLogger("specialwash.access").disabled = True  # los 400 de stock se registran siempre
+        from sqlalchemy import event
+        from api.models import db
+
+        with app.app_context():
+            engine = db.engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _t0(conn, _cur, stmt, _p, _ctx, _many):
+            if "FOR UPDATE" in stmt or stmt.lstrip().startswith("UPDATE producto"):
+                conn.info["stress_t0"] = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _t1(conn, _cur, _stmt, _p, _ctx, _many):
+            t0 = conn.info.pop("stress_t0", None)
+            if t0 is not None:
+                with lock_mutex:
+                    lock_times.append(time.perf_counter() - t0)
+
+        nuevo_cliente = lambda: _ClienteWSGI(app)  # noqa: E731
+
+    pids, calientes, tokens = cfg["pids"], cfg["calientes"], cfg["tokens"]
+    lat = {"entrada": [], "salida": [], "lote": []}
+    estados = Counter()
+    aceptadas = Counter()
+
+    def producto():
+        return rng.choice(calientes) if rng.random() < cfg["p_caliente"] else rng.choice(pids)
+
+    def plan():
+        r = rng.random()
+        if r < cfg["p_lote"]:
+            lineas = [{"producto_id": producto(), "cantidad": rng.randint(1, 3)}
+                      for _ in range(rng.randint(2, 10))]
+            return "lote", "/api/registro-salida/lote", {"lineas": lineas}, rng.choice(tokens["admin"])
+        if r < cfg["p_lote"] + cfg["p_salida"]:
+            return ("salida", "/api/registro-salida", {"producto_id": producto(), "cantidad": rng.randint(1, 3)},
+                    rng.choice(tokens["empleado"]))
+        return ("entrada", "/api/registro-entrada", {"producto_id": producto(), "cantidad": rng.randint(1, 10)},
+                rng.choice(tokens["admin"]))
+
+    planes = [plan() for _ in range(n)]
+    cola = iter(planes)
+    cola_mutex = threading.Lock()
+    res_mutex = threading.Lock()
+    barrera = threading.Barrier(cfg["hilos"])
+
+    def hilo():
+        cliente = nuevo_cliente()
+        barrera.wait()
+        while True:
+            with cola_mutex:
+                item = next(cola, None)
+            if item is None:
+                return
+            tipo, path, body, token = item
+            t0 = time.perf_counter()
+            try:
+                status, data = cliente.post(path, body, token)
+            except Exception as e:  # conexión caída, timeout...
+                status, data = 599, str(e).encode()
+            dt = time.perf_counter() - t0
+            with res_mutex:
+                lat[tipo].append(dt)
+                estados[(tipo, status)] += 1
+                if status == 201:
+                    aceptadas[tipo] += 1
+                    if tipo == "lote":
+                        aceptadas["lineas_lote"] += len(body["lineas"])
+                elif status >= 500:
+                    # las rutas devuelven el error de BD en "detail"
+                    errores_srv[_clasificar(data.decode("utf-8", "replace"))] += 1
+
+    hilos = [threading.Thread(target=hilo) for _ in range(cfg["hilos"])]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return {"lat": lat, "estados": estados, "aceptadas": aceptadas,
+            "errores_srv": errores_srv, "lock_times": lock_times}
+
+
+# ==========================
+# Informe
+# ==========================
+def _pct(valores, q):
+    if not valores:
+        return 0.0
+    s = sorted(valores)
+    return s[min(len(s) - 1, int(len(s) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--peticiones", type=int, default=4000)
+    parser.add_argument("--procesos", type=int, default=4)
+    parser.add_argument("--hilos", type=int, default=8, help="Hilos por proceso.")
+    parser.add_argument("--productos", type=int, default=50)
+    parser.add_argument("--calientes", type=int, default=3, help="Productos que reciben la mayoría de la carga.")
+    parser.add_argument("--p-caliente", type=float, default=0.8)
+    parser.add_argument("--p-salida", type=float, default=0.65)
+    parser.add_argument("--p-lote", type=float, default=0.05)
+    parser.add_argument("--stock-inicial", type=int, default=200)
+    parser.add_argument("--db-url", help="Por defecto, una SQLite temporal. Con Postgres, una base vacía.")
+    parser.add_argument("--url", help="Atacar un servidor ya arrancado (p. ej. gunicorn) en lugar de la app en proceso.")
+    parser.add_argument("--semilla", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.url and not args.db_url:
+        parser.error("--url necesita --db-url (la base del servidor, para preparar y verificar)")
+
+    db_url = args.db_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="sw-stress-"), "stress.db")
+    app = build_app(db_url)
+    pids, tokens = preparar(app, args.productos, args.stock_inicial, n_empleados=max(args.hilos, 4))
+    libro_antes = contar_libro(app)
+
+    cfg = {
+        "db_url": db_url, "url": args.url, "semilla": args.semilla, "hilos": args.hilos,
+        "pids": pids, "calientes": pids[:args.calientes], "tokens": tokens,
+        "p_caliente": args.p_caliente, "p_salida": args.p_salida, "p_lote": args.p_lote,
+    }
+    reparto = [args.peticiones // args.procesos + (i < args.peticiones % args.procesos)
+               for i in range(args.procesos)]
+
+    print(f"{db_url.split(':', 1)[0]}: {args.peticiones} peticiones, {args.procesos} procesos x "
+          f"{args.hilos} hilos, {args.calientes} productos calientes de {args.productos}"
+          + (f", vía {args.url}" if args.url else ", app WSGI en proceso"))
+
+    # spawn: cada proceso abre su propio pool de conexiones (como un worker)
+    ctx = multiprocessing.get_context("spawn")
+    t0 = time.perf_counter()
+    with ctx.Pool(args.procesos) as pool:
+        partes = pool.map(_worker, [(i, n, cfg) for i, n in enumerate(reparto)])
+    total_s = time.perf_counter() - t0
+
+    lat = {"entrada": [], "salida": [], "lote": []}
+    estados, aceptadas, errores_srv, lock_times = Counter(), Counter(), Counter(), []
+    for p in partes:
+        for k in lat:
+            lat[k] += p["lat"][k]
+        estados.update(p["estados"])
+        aceptadas.update(p["aceptadas"])
+        errores_srv.update(p["errores_srv"])
+        lock_times += p["lock_times"]
+
+    print(f"\n{args.peticiones} peticiones en {total_s:.1f} s: {args.peticiones / total_s:.0f} req/s")
+    print(f"{'tipo':<9}{'total':>7}{'201':>7}{'4xx':>7}{'5xx':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for tipo, ls in lat.items():
+        if not ls:
+            continue
+        n4 = sum(v for (t, s), v in estados.items() if t == tipo and 400 <= s < 500)
+        n5 = sum(v for (t, s), v in estados.items() if t == tipo and s >= 500)
+        print(f"{tipo:<9}{len(ls):>7}{aceptadas[tipo]:>7}{n4:>7}{n5:>7}"
+              f"{_pct(ls, .5):>9.1f}{_pct(ls, .95):>9.1f}{_pct(ls, .99):>9.1f}")
+
+    if lock_times:
+        print(f"\nsentencias con lock de producto: {len(lock_times)}, total {sum(lock_times):.2f} s, "
+              f"p95 {_pct(lock_times, .95):.1f} ms, máx {max(lock_times) * 1000:.1f} ms")
+    if errores_srv:
+        print("errores del servidor: " + ", ".join(f"{k}={v}" for k, v in errores_srv.most_common()))
+    else:
+        print("sin errores de servidor (ni deadlocks ni bloqueos)")
+
+    fallos = verificar(app, libro_antes, aceptadas)
+    if fallos:
+        print("\nVERIFICACIÓN FALLIDA:")
+        for f in fallos[:50]:
+            print(f"  {f}")
+        sys.exit(1)
+    print("\nverificación OK: stock_actual == entradas - salidas, libro y stock_diario cuadran")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# src/api/access_log.py
+"""
+Access log estructurado (una línea JSON por petición).
+
+La petición solo encola el registro (QueueHandler); un hilo de fondo
+(QueueListener) lo formatea y lo escribe en stdout, así que ninguna
+respuesta espera a un flush de stdout.
+
+- Las respuestas correctas (< 400) se muestrean con ACCESS_LOG_SAMPLE
+  (0..1; 1 = todas).
+- Los errores (>= 400) y las peticiones lentas (> ACCESS_LOG_SLOW_MS) se
+  registran siempre.
+- Cada línea lleva la duración, los bytes del cuerpo tal como se envían
+  (ya comprimido; null en streaming) y el tiempo/nº de consultas de BD
+  (api/sql_stats.py). Los parámetros sensibles de la query string se
+  enmascaran.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode
+
+from flask import g, request
+
+from . import sql_stats
+
+SAMPLE = float(os.getenv("ACCESS_LOG_SAMPLE", "1"))
+SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+
+_SENSIBLES = {"token", "access_token", "jwt", "password", "pwd", "secret", "key", "api_key"}
+_REDACTED = "***"
+
+logger = logging.getLogger("specialwash.access")
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # se encola el dict tal cual: el JSON se genera en el hilo del listener
+        return record
+
+
+def _query():
+    raw = request.query_string.decode("latin-1")
+    if not raw:
+        return None
+    pares = parse_qsl(raw, keep_blank_values=True)
+    return urlencode([(k, _REDACTED if k.lower() in _SENSIBLES else v) for k, v in pares], safe="*")
+
+
+def _debe_registrar(status, dur_ms):
+    return status >= 400 or dur_ms > SLOW_MS or random.random() < SAMPLE
+
+
+def init_app(app):
+    cola = queue.SimpleQueue()
+    salida = logging.StreamHandler(sys.stdout)
+    salida.setFormatter(JSONFormatter())
+    listener = logging.handlers.QueueListener(cola, salida)
+    listener.start()
+    atexit.register(listener.stop)  # vacía la cola al salir
+
+    logger.handlers[:] = [_QueueHandler(cola)]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    @app.before_request
+    def _access_log_start():
+        g.access_t0 = time.perf_counter()
+
+    @app.after_request
+    def _access_log(resp):
+        t0 = g.get("access_t0")
+        if t0 is None:
+            return resp
+        dur_ms = (time.perf_counter() - t0) * 1000
+        if not _debe_registrar(resp.status_code, dur_ms):
+            return resp
+
+        entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "method": request.method,
+            "path": request.path,
+            "query": _query(),
+            "route": request.url_rule.rule if request.url_rule is not None else None,
+            "status": resp.status_code,
+            "dur_ms": round(dur_ms, 1),
+            "bytes": resp.calculate_content_length(),
+            "origin": request.headers.get("Origin"),
+            "pid": os.getpid(),
+        }
+        stats = sql_stats.current()
+        if stats is not None:
+            entry["db_ms"] = round(stats.total * 1000, 1)
+            entry["db_n"] = stats.count
+        logger.info(entry)
+        return resp
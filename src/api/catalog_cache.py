@@ -0,0 +1,204 @@
+# src/api/catalog_cache.py
+"""
+Versionado de catálogos (producto, proveedor, maquinaria) para ETag / 304.
+
+Cada tabla tiene un contador que se incrementa una vez por transacción que
+la modifica. Los cambios ORM se detectan solos en after_flush; las
+sentencias Core (UPDATE de stock) deben llamar a touch().
+
+- Postgres: una secuencia por catálogo, con nextval justo después del
+  commit. No toca ninguna fila, así que las entradas/salidas concurrentes
+  no se serializan en un contador común. Entre el commit y el nextval un
+  lector puede ver los datos nuevos con la versión anterior; el nextval
+  invalida lo que haya cacheado en ese intervalo.
+- Otros motores (SQLite): fila de catalogo_version actualizada dentro de la
+  transacción, antes del commit (las escrituras ya están serializadas).
+
+Un GET condicional cuesta así una lectura por clave primaria: si el
+If-None-Match coincide se responde 304 sin consultar ni serializar nada.
+
+Además, cada worker guarda las respuestas ya serializadas en una LRU con TTL,
+indexada por (tabla, query string) y validada contra la versión: un commit
+en este proceso invalida sus entradas en after_commit, y uno en otro worker
+se detecta porque la versión leída ya no coincide.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import request, make_response
+from sqlalchemy import event, select, text
+
+from .models import db, CatalogoVersion, CATALOGO_SECUENCIAS
+
+CATALOGOS = ("producto", "proveedor", "maquinaria")
+
+_T = CatalogoVersion.__table__
+_INFO_KEY = "catalogos_tocados"
+_INFO_COMMIT_KEY = "catalogos_en_commit"
+
+
+class LRUCache:
+    """LRU acotada con TTL, segura entre hilos (gthread)."""
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key, version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version or entry[1] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._data[key] = (version, time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tabla):
+        with self._lock:
+            for key in [k for k in self._data if k[0] == tabla]:
+                del self._data[key]
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 3) if total else None,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+cache = LRUCache(
+    maxsize=int(os.getenv("CATALOG_CACHE_MAXSIZE", "256")),
+    ttl=int(os.getenv("CATALOG_CACHE_TTL", "300")),
+)
+
+
+def touch(*tablas):
+    """Marca tablas de catálogo modificadas en la transacción actual."""
+    db.session.info.setdefault(_INFO_KEY, set()).update(tablas)
+
+
+def _secuencias():
+    return db.engine.dialect.name == "postgresql"
+
+
+def version(tabla):
+    if _secuencias():
+        return db.session.execute(text(f"SELECT last_value FROM {CATALOGO_SECUENCIAS[tabla].name}")).scalar()
+    v = db.session.execute(select(_T.c.version).where(_T.c.tabla == tabla)).scalar()
+    return v or 0
+
+
+def _bump_secuencias(tablas):
+    # conexión aparte en autocommit: la sesión ya no admite SQL en after_commit
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(select(*(CATALOGO_SECUENCIAS[t].next_value() for t in sorted(tablas))))
+
+
+def _bump(session, tablas):
+    for tabla in sorted(tablas):
+        res = session.execute(
+            _T.update().where(_T.c.tabla == tabla).values(version=_T.c.version + 1)
+        )
+        if res.rowcount == 0:
+            session.execute(_T.insert().values(tabla=tabla, version=1))
+
+
+@event.listens_for(db.session, "after_flush")
+def _track_orm_changes(session, _flush_context):
+    tocadas = {
+        getattr(obj, "__tablename__", None)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    }
+    tocadas &= set(CATALOGOS)
+    if tocadas:
+        session.info.setdefault(_INFO_KEY, set()).update(tocadas)
+
+
+@event.listens_for(db.session, "before_commit")
+def _bump_on_commit(session):
+    session.flush()
+    tocadas = session.info.pop(_INFO_KEY, None)
+    if tocadas:
+        if not _secuencias():
+            _bump(session, tocadas)
+        session.info[_INFO_COMMIT_KEY] = tocadas
+
+
+@event.listens_for(db.session, "after_commit")
+def _invalidate_on_commit(session):
+    tocadas = session.info.pop(_INFO_COMMIT_KEY, ())
+    if tocadas and _secuencias():
+        _bump_secuencias(tocadas)
+    for tabla in tocadas:
+        cache.invalidate(tabla)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _forget_on_rollback(session, _previous_transaction):
+    session.info.pop(_INFO_KEY, None)
+    session.info.pop(_INFO_COMMIT_KEY, None)
+
+
+def _etag(tabla, v):
+    """ETag fuerte: versión de la tabla + parámetros de la petición."""
+    args = request.query_string or b""
+    h = hashlib.blake2s(args, digest_size=6).hexdigest()
+    return f"{tabla}-v{v}-{h}"
+
+
+def conditional(tabla, build):
+    """
+    Devuelve 304 si el cliente ya tiene la versión vigente; si no, sirve la
+    respuesta de la caché o llama a build() y la guarda. Solo las respuestas
+    200 (y los 304) llevan ETag y X-Cache: un error no se puede revalidar.
+    """
+    v = version(tabla)
+    etag = _etag(tabla, v)
+    # comparación débil: la compresión (api/compression.py) sirve el ETag como W/"..."
+    if request.if_none_match.contains_weak(etag):
+        resp = make_response("", 304)
+    else:
+        key = (tabla, request.query_string)
+        body = cache.get(key, v)
+        if body is not None:
+            resp = make_response(body)
+            resp.mimetype = "application/json"
+            resp.headers["X-Cache"] = "HIT"
+        else:
+            resp = make_response(build())
+            if resp.status_code != 200:
+                return resp
+            cache.set(key, v, resp.get_data())
+            resp.headers["X-Cache"] = "MISS"
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
@@ -1,7 +1,10 @@
 # src/api/commands.py
+import click
 from flask import current_app
 from werkzeug.security import generate_password_hash
 from .models import db, User, Producto, Proveedor
+from .csv_import import import_entradas, CSVImportError
+from . import stock_diario, snapshots, reconcile, seed
 
 def setup_commands(app):
     @app.cli.command("create-admin")
@@ -56,3 +59,66 @@ def setup_commands(app):
                 ])
             db.session.commit()
             print("Datos de prueba insertados.")
+
+    @app.cli.command("import-entradas")
+    @click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--chunk-size", default=5000, show_default=True, help="Filas por INSERT/UPDATE.")
+    def import_entradas_cli(csv_path, chunk_size):
+        """Importa entradas (líneas de albarán) desde un CSV. Uso: flask import-entradas fichero.csv"""
+        with app.app_context():
+            with open(csv_path, encoding="utf-8-sig", newline="") as fh:
+                try:
+                    res = import_entradas(fh, chunk_size=chunk_size)
+                except CSVImportError as e:
+                    raise click.ClickException(str(e))
+            if not res["ok"]:
+                for err in res["errores"]:
+                    print(f"  línea {err['linea']}: {err['msg']}")
+                raise click.ClickException(f"Importación cancelada: {len(res['errores'])} errores en {res['lineas']} líneas.")
+            print(f"{res['importadas']} entradas importadas.")
+
+    @app.cli.command("rebuild-stock-diario")
+    def rebuild_stock_diario_cli():
+        """Reconstruye la tabla stock_diario desde el histórico de entradas y salidas."""
+        with app.app_context():
+            n = stock_diario.rebuild()
+            print(f"stock_diario reconstruido: {n} filas.")
+
+    @app.cli.command("stock-snapshot")
+    def stock_snapshot_cli():
+        """Guarda una foto de stock_actual de todos los productos. Programar periódicamente (cron diario)."""
+        with app.app_context():
+            n = snapshots.take_snapshot()
+            print(f"Snapshot de stock guardado: {n} productos.")
+
+    @app.cli.command("reconcile-stock")
+    @click.option("--fix", is_flag=True, help="Corrige stock_actual = entradas - salidas.")
+    def reconcile_stock_cli(fix):
+        """Compara stock_actual con el libro de entradas/salidas de todo el catálogo."""
+        with app.app_context():
+            items = reconcile.drift()
+            for it in items:
+                print(f"  [{it['producto_id']}] {it['nombre']}: stock_actual={it['stock_actual']} "
+                      f"ledger={it['ledger']} ({it['diferencia']:+d})")
+            print(f"{len(items)} productos con desviación.")
+            if fix and items:
+                print(f"{reconcile.repair([it['producto_id'] for it in items])} productos corregidos.")
+
+    @app.cli.command("seed-load")
+    @click.option("--productos", default=5000, show_default=True)
+    @click.option("--proveedores", default=200, show_default=True)
+    @click.option("--usuarios", default=50, show_default=True)
+    @click.option("--salidas", default=2_000_000, show_default=True)
+    @click.option("--entradas", type=int, default=None, help="Por defecto, salidas / 10.")
+    @click.option("--anios", default=3, show_default=True, help="Años de histórico.")
+    @click.option("--semilla", default=42, show_default=True, help="Misma semilla, mismos datos.")
+    def seed_load_cli(productos, proveedores, usuarios, salidas, entradas, anios, semilla):
+        """Genera datos sintéticos de volumen (inserts masivos) en una base sin productos."""
+        with app.app_context():
+            try:
+                res = seed.seed_load(productos=productos, proveedores=proveedores, usuarios=usuarios,
+                                     salidas=salidas, entradas=entradas, anios=anios, semilla=semilla)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+            print(", ".join(f"{k}={v}" for k, v in res.items()))
+            print(f"Contraseña de los usuarios generados: {seed.PASSWORD}")
@@ -0,0 +1,103 @@
+# src/api/compression.py
+"""
+Compresión de respuestas (gzip / brotli) según Accept-Encoding.
+
+- Solo tipos de texto (JSON, NDJSON, CSV, HTML, JS...) y solo por encima de
+  COMPRESS_MIN_SIZE bytes: por debajo la cabecera y la CPU no compensan.
+- Niveles moderados (gzip 5, brotli 4): casi toda la reducción de un JSON
+  repetitivo con una fracción de la CPU de los niveles máximos.
+- Las respuestas en streaming (exports) se comprimen trozo a trozo con un
+  flush por trozo, así que el cliente sigue recibiendo datos sin esperar
+  al final y la memoria no crece con el tamaño del export.
+- El ETag pasa a débil (W/"..."): el cuerpo cambia con la codificación.
+"""
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+from flask import request
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+_TIPOS = ("application/json", "application/x-ndjson", "application/javascript", "image/svg+xml")
+
+
+def _comprimible(resp):
+    mt = resp.mimetype or ""
+    return mt.startswith("text/") or mt in _TIPOS
+
+
+def _encoding():
+    ofertas = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(ofertas)
+
+
+class _Compresor:
+    def __init__(self, encoding):
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._write, self._flush, self._end = self._c.process, self._c.flush, self._c.finish
+        else:
+            # wbits 16+: cabecera y trailer gzip
+            self._c = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._write = self._c.compress
+            self._flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+            self._end = self._c.flush
+
+    def all(self, data):
+        return self._write(data) + self._end()
+
+    def stream(self, chunks):
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                out = self._write(chunk) + self._flush()
+                if out:
+                    yield out
+            yield self._end()
+        finally:
+            # cierra el generador original (libera el contexto de stream_with_context)
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+
+def _comprimir(resp):
+    if (
+        resp.status_code < 200 or resp.status_code in (204, 304)
+        or resp.direct_passthrough
+        or "Content-Encoding" in resp.headers
+        or not _comprimible(resp)
+    ):
+        return resp
+
+    resp.vary.add("Accept-Encoding")
+    encoding = _encoding()
+    if not encoding:
+        return resp
+
+    if resp.is_streamed:
+        resp.response = _Compresor(encoding).stream(resp.response)
+        resp.headers.pop("Content-Length", None)
+    else:
+        data = resp.get_data()
+        if len(data) < MIN_SIZE:
+            return resp
+        resp.set_data(_Compresor(encoding).all(data))
+
+    resp.headers["Content-Encoding"] = encoding
+    etag, weak = resp.get_etag()
+    if etag and not weak:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+
+def init_app(app):
+    app.after_request(_comprimir)
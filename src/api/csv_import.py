@@ -0,0 +1,146 @@
+# src/api/csv_import.py
+"""
+Importación masiva de entradas (líneas de albarán) desde CSV.
+
+El CSV se lee en streaming, se valida contra mapas de ids precargados y las
+entradas se insertan por bloques. El delta de stock se acumula por producto
+durante todo el fichero y se aplica una sola vez al final, bloqueando los
+productos en orden de id como el resto de escrituras de stock (así la
+importación no puede interbloquearse con un lote de salidas). Todo va en
+una sola transacción: si alguna línea es inválida no se aplica nada.
+
+Columnas (cabecera obligatoria; el orden da igual):
+    producto_id, cantidad                      -- obligatorias
+    proveedor_id, numero_albaran, precio_sin_iva,
+    porcentaje_iva, valor_iva, precio_con_iva  -- opcionales
+"""
+import csv
+from collections import defaultdict
+
+from sqlalchemy import case, func, select, update
+
+from .models import db, Producto, Proveedor, Entrada
+from . import stock_diario, catalog_cache, suggest
+
+CHUNK_SIZE = 5000
+MAX_ERRORES = 100
+
+_FLOATS = ("precio_sin_iva", "porcentaje_iva", "valor_iva", "precio_con_iva")
+
+
+class CSVImportError(Exception):
+    """El CSV no se puede procesar (cabecera, formato)."""
+
+
+def _opt_int(v):
+    v = (v or "").strip()
+    return int(v) if v else None
+
+
+def _opt_float(v):
+    v = (v or "").strip().replace(",", ".")
+    return float(v) if v else None
+
+
+def _parse_line(rec, productos, proveedores):
+    """Convierte una fila del CSV en dict para el INSERT o lanza ValueError."""
+    try:
+        pid = int((rec.get("producto_id") or "").strip())
+        cantidad = int((rec.get("cantidad") or "").strip())
+        prov_id = _opt_int(rec.get("proveedor_id"))
+        precios = {k: _opt_float(rec.get(k)) for k in _FLOATS}
+    except ValueError:
+        raise ValueError("Valores numéricos inválidos")
+
+    if cantidad <= 0:
+        raise ValueError("cantidad debe ser > 0")
+    if pid not in productos:
+        raise ValueError(f"Producto {pid} no existe")
+    if prov_id is not None and prov_id not in proveedores:
+        raise ValueError(f"Proveedor {prov_id} no existe")
+
+    return {
+        "producto_id": pid,
+        "proveedor_id": prov_id,
+        "cantidad": cantidad,
+        "numero_albaran": (rec.get("numero_albaran") or rec.get("numero_documento") or "").strip() or None,
+        **precios,
+    }
+
+
+def _flush_chunk(rows, delta):
+    """Inserta el bloque y acumula su delta de stock por producto."""
+    db.session.execute(Entrada.__table__.insert(), rows)
+    for r in rows:
+        delta[r["producto_id"]] += r["cantidad"]
+
+
+def _aplicar_stock(delta):
+    """Un único UPDATE con el delta total, tras bloquear los productos en orden de id."""
+    ids = sorted(delta)
+    # FOR NO KEY UPDATE en Postgres (el lock que toma el propio UPDATE);
+    # SQLite lo omite y el UPDATE es atómico por sí mismo.
+    db.session.execute(
+        select(Producto.id).where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update(key_share=True)
+    )
+    db.session.execute(
+        update(Producto.__table__)
+        .where(Producto.id.in_(ids))
+        .values(stock_actual=func.coalesce(Producto.stock_actual, 0) + case(delta, value=Producto.id, else_=0))
+    )
+    stock_diario.acumular({pid: (n, 0) for pid, n in delta.items()})
+    catalog_cache.touch("producto")
+    suggest.mark_stale()
+
+
+def import_entradas(stream, chunk_size=CHUNK_SIZE):
+    """
+    Importa entradas desde un stream de texto CSV.
+    Devuelve {"ok", "lineas", "importadas", "errores"}; con errores no se
+    confirma nada (rollback).
+    """
+    reader = csv.DictReader(stream)
+    header = {(h or "").strip() for h in (reader.fieldnames or [])}
+    if not {"producto_id", "cantidad"} <= header:
+        raise CSVImportError("La cabecera debe incluir producto_id y cantidad")
+    reader.fieldnames = [(h or "").strip() for h in reader.fieldnames]
+
+    productos = set(db.session.execute(select(Producto.id)).scalars())
+    proveedores = set(db.session.execute(select(Proveedor.id)).scalars())
+
+    errores = []
+    n_lineas = 0
+    n_ok = 0
+    chunk = []
+    delta = defaultdict(int)
+    try:
+        for n_lineas, rec in enumerate(reader, start=1):
+            try:
+                chunk.append(_parse_line(rec, productos, proveedores))
+            except ValueError as e:
+                if len(errores) < MAX_ERRORES:
+                    errores.append({"linea": reader.line_num, "msg": str(e)})
+                continue
+            if errores:
+                # ya no se va a confirmar: solo seguimos validando
+                chunk.clear()
+            elif len(chunk) >= chunk_size:
+                _flush_chunk(chunk, delta)
+                n_ok += len(chunk)
+                chunk = []
+
+        if errores:
+            db.session.rollback()
+            return {"ok": False, "lineas": n_lineas, "importadas": 0, "errores": errores}
+
+        if chunk:
+            _flush_chunk(chunk, delta)
+            n_ok += len(chunk)
+        if delta:
+            _aplicar_stock(dict(delta))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {"ok": True, "lineas": n_lineas, "importadas": n_ok, "errores": []}
@@ -0,0 +1,104 @@
+# src/api/fieldsets.py
+"""
+Campos a medida en los listados (?fields=id,nombre,stock_actual).
+
+Cada recurso declara qué campos expone, con la columna que los sirve y la
+relación que hay que unir (si hace falta). Con ?fields= el listado se
+resuelve como proyección de columnas: solo se seleccionan esas columnas,
+solo se hacen los JOIN que piden los campos y no se hidratan objetos ORM.
+Sin ?fields= los endpoints siguen serializando con to_dict().
+"""
+from flask import request
+from sqlalchemy import func
+
+from .models import User, Producto, Proveedor, Entrada, Salida, Maquinaria
+
+
+class FieldsError(ValueError):
+    """?fields= vacío o con campos que el recurso no expone."""
+
+
+def _cols(model, *names):
+    return {n: (getattr(model, n), None) for n in names}
+
+
+_salida_fecha = func.coalesce(Salida.fecha, Salida.created_at)
+
+SPECS = {
+    "usuario": _cols(User, "id", "nombre", "email", "rol", "activo"),
+    "proveedor": _cols(Proveedor, "id", "nombre", "telefono", "email", "direccion", "contacto", "notas"),
+    "producto": _cols(
+        Producto, "id", "nombre", "categoria", "codigo", "stock_minimo", "stock_actual", "created_at",
+    ),
+    "maquinaria": _cols(
+        Maquinaria, "id", "nombre", "tipo", "marca", "modelo", "numero_serie", "ubicacion",
+        "estado", "fecha_compra", "notas", "created_at",
+    ),
+    "salida": {
+        **_cols(Salida, "id", "producto_id", "usuario_id", "cantidad", "observaciones"),
+        "fecha": (_salida_fecha, None),
+        "created_at": (_salida_fecha, None),
+        "producto_nombre": (Producto.nombre, Salida.producto),
+        "usuario_nombre": (User.nombre, Salida.usuario),
+    },
+    # entradas: los datos de producto/proveedor van planos (en el listado completo van anidados)
+    "entrada": {
+        **_cols(
+            Entrada, "id", "fecha", "created_at", "cantidad", "numero_albaran", "precio_sin_iva",
+            "porcentaje_iva", "valor_iva", "precio_con_iva", "producto_id", "proveedor_id",
+        ),
+        "producto_nombre": (Producto.nombre, Entrada.producto),
+        "proveedor_nombre": (Proveedor.nombre, Entrada.proveedor),
+    },
+}
+
+# columnas extra para el cursor de la paginación keyset
+_K_FECHA, _K_ID = "k_fecha", "k_id"
+
+
+def requested(recurso):
+    """Campos pedidos en ?fields= (en orden, sin repetir) o None si no viene."""
+    raw = request.args.get("fields")
+    if raw is None:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in raw.split(",") if f.strip()))
+    if not names:
+        raise FieldsError("fields vacío")
+    desconocidos = [n for n in names if n not in SPECS[recurso]]
+    if desconocidos:
+        raise FieldsError(f"Campos no válidos: {', '.join(desconocidos)}")
+    return names
+
+
+def project(query, recurso, names, keyset_model=None):
+    """
+    Convierte una query ORM (sin joinedload) en la proyección de 'names':
+    añade los OUTER JOIN necesarios y selecciona solo esas columnas. Con
+    keyset_model se añaden también (fecha, id) para el cursor.
+    """
+    spec = SPECS[recurso]
+    cols, joins = [], {}
+    for n in names:
+        expr, rel = spec[n]
+        cols.append(expr.label(n))
+        if rel is not None:
+            joins.setdefault(rel.key, rel)
+    if keyset_model is not None:
+        cols += [keyset_model.fecha.label(_K_FECHA), keyset_model.id.label(_K_ID)]
+    for rel in joins.values():
+        query = query.outerjoin(rel)
+    return query.with_entities(*cols)
+
+
+def serializer(names):
+    """Fila de project() -> dict solo con los campos pedidos."""
+    def serialize(row):
+        m = row._mapping
+        return {n: m[n] for n in names}
+    return serialize
+
+
+def cursor_key(row):
+    """(fecha, id) de una fila de project(..., keyset_model=...)."""
+    m = row._mapping
+    return m[_K_FECHA], m[_K_ID]
@@ -0,0 +1,60 @@
+# src/api/json_provider.py
+"""
+Proveedor JSON de la app (app.json) sobre orjson.
+
+orjson serializa datetime/date de forma nativa en ISO 8601 (igual que
+isoformat()), así que los to_dict() devuelven las fechas tal cual y la
+conversión se hace en C al generar la respuesta. Si orjson no está
+instalado se usa el json de la stdlib con el mismo formato de fechas
+(Flask por defecto las convierte a fecha HTTP, RFC 822).
+"""
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+_OPTS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(o):
+    """Tipos que ni orjson ni json conocen; fechas en ISO en lugar de RFC 822."""
+    if isinstance(o, date):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """json de la stdlib con fechas ISO (respaldo sin orjson)."""
+    default = staticmethod(_default)
+    sort_keys = False
+    ensure_ascii = False
+
+
+class OrjsonProvider(IsoJSONProvider):
+    """orjson para respuestas, dumps y loads; la stdlib cubre lo que orjson no admite."""
+
+    def _opts(self):
+        return _OPTS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+
+    def dumps(self, obj, **kwargs):
+        # kwargs (indent, cls...) solo los entiende la stdlib
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._opts()).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # En debug (salida indentada) se delega en la stdlib
+        if orjson is None or (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        data = orjson.dumps(obj, default=self.default, option=self._opts() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
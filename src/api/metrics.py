@@ -0,0 +1,145 @@
+# src/api/metrics.py
+"""
+Métricas en formato Prometheus (GET /metrics).
+
+- http_requests_total{method,route,status}
+- http_request_duration_seconds{method,route} (histograma, para p50/p99)
+- http_requests_in_flight
+- db_pool_checked_out / db_pool_overflow y db_pool_checkouts_total
+
+'route' es la regla de Flask (/api/productos/<int:pid>), no la URL, para no
+disparar la cardinalidad; lo que no casa con ninguna regla va como "<404>".
+
+Con gunicorn (varios workers) cada proceso escribe sus valores en ficheros
+mmap bajo PROMETHEUS_MULTIPROC_DIR y /metrics los agrega todos; el
+directorio lo prepara gunicorn.conf.py. Sin esa variable (flask run) se usa
+el registro en memoria del proceso.
+
+La latencia se observa al cerrar la respuesta (call_on_close), así que
+incluye la compresión y el envío de las respuestas en streaming.
+
+/metrics nunca queda abierto en el puerto público: solo se registra si
+METRICS_TOKEN está definido, y entonces exige "Authorization: Bearer
+<token>". Sin token, las métricas se sirven en un listener interno si se
+define METRICS_PORT (escucha en METRICS_ADDR, 127.0.0.1 por defecto); con
+gunicorn lo arranca el master (gunicorn.conf.py).
+"""
+import os
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+        start_http_server,
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover - dependencia opcional
+    multiprocess = None
+
+_MULTIPROC = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+if multiprocess is not None:
+    REQUESTS = Counter("http_requests_total", "Peticiones HTTP", ["method", "route", "status"])
+    LATENCY = Histogram(
+        "http_request_duration_seconds", "Latencia de las peticiones HTTP", ["method", "route"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    IN_FLIGHT = Gauge("http_requests_in_flight", "Peticiones en curso", multiprocess_mode="livesum")
+    POOL_CHECKED_OUT = Gauge(
+        "db_pool_checked_out", "Conexiones del pool en uso", multiprocess_mode="livesum",
+    )
+    POOL_OVERFLOW = Gauge(
+        "db_pool_overflow", "Conexiones por encima de pool_size", multiprocess_mode="livesum",
+    )
+    POOL_CHECKOUTS = Counter("db_pool_checkouts", "Conexiones sacadas del pool")
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<404>"
+
+
+def _overflow(pool):
+    fn = getattr(pool, "overflow", None)
+    return max(fn(), 0) if fn else 0
+
+
+def _watch_pool(engine):
+    pool = engine.pool
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(_dbapi_conn, _record, _proxy):
+        POOL_CHECKOUTS.inc()
+        POOL_CHECKED_OUT.inc()
+        POOL_OVERFLOW.set(_overflow(pool))
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(_dbapi_conn, _record):
+        POOL_CHECKED_OUT.dec()
+        POOL_OVERFLOW.set(_overflow(pool))
+
+
+def _registry():
+    if _MULTIPROC:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    from prometheus_client import REGISTRY
+    return REGISTRY
+
+
+def start_listener(port, addr=None):
+    """Sirve las métricas en un puerto aparte (por defecto solo en loopback)."""
+    start_http_server(port, addr=addr or os.getenv("METRICS_ADDR", "127.0.0.1"), registry=_registry())
+
+
+def init_app(app, db):
+    if multiprocess is None:
+        app.logger.warning("prometheus_client no está instalado: /metrics desactivado")
+        return
+
+    token = os.getenv("METRICS_TOKEN")
+    with app.app_context():
+        _watch_pool(db.engine)
+
+    @app.before_request
+    def _metrics_start():
+        g.metrics_t0 = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def _metrics_observe(resp):
+        t0 = g.pop("metrics_t0", None)
+        if t0 is not None:
+            method, route = request.method, _route()
+
+            def _observe():
+                LATENCY.labels(method, route).observe(time.perf_counter() - t0)
+                REQUESTS.labels(method, route, str(resp.status_code)).inc()
+                IN_FLIGHT.dec()
+
+            resp.call_on_close(_observe)
+        return resp
+
+    @app.teardown_request
+    def _metrics_end(_exc):
+        # solo si after_request no llegó a ejecutarse
+        if g.pop("metrics_t0", None) is not None:
+            IN_FLIGHT.dec()
+
+    port = os.getenv("METRICS_PORT")
+    if port and not _MULTIPROC:
+        start_listener(int(port))
+
+    if not token:
+        app.logger.info("METRICS_TOKEN sin definir: GET /metrics no se expone en la app")
+        return
+
+    @app.get("/metrics")
+    def metrics():
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(generate_latest(_registry()), headers={"Content-Type": CONTENT_TYPE_LATEST})
@@ -2,6 +2,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 
 db = SQLAlchemy()
@@ -20,6 +22,28 @@ def iso(dt):
         return str(dt)
 
 
+class ahora(FunctionElement):
+    """
+    now() del servidor para server_default. En SQLite se escribe con el
+    mismo texto que SQLAlchemy usa para los datetime ('YYYY-MM-DD
+    HH:MM:SS.ffffff'): las fechas se comparan como texto, y un único
+    formato hace que el orden y los índices por fecha sean válidos.
+    """
+    type = db.DateTime(timezone=True)
+    name = "ahora"
+    inherit_cache = True
+
+
+@compiles(ahora)
+def _ahora(element, compiler, **kw):
+    return compiler.process(func.now(), **kw)
+
+
+@compiles(ahora, "sqlite")
+def _ahora_sqlite(element, compiler, **kw):
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
 # ----------------------------
 # User
 # ----------------------------
@@ -33,8 +57,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     activo = db.Column(db.Boolean, default=True, nullable=False)
 
-    # relaciones
-    salidas = relationship("Salida", back_populates="usuario", lazy="selectin")
+    # relaciones (lazy: cada endpoint pide explícitamente lo que usa)
+    salidas = relationship("Salida", back_populates="usuario", lazy="select")
 
     def to_dict(self):
         return {
@@ -65,7 +89,7 @@ class Proveedor(db.Model):
     notas = db.Column(db.Text)
 
     # relaciones
-    entradas = relationship("Entrada", back_populates="proveedor", lazy="selectin")
+    entradas = relationship("Entrada", back_populates="proveedor", lazy="select")
 
     def to_dict(self):
         return {
@@ -87,28 +111,35 @@ class Proveedor(db.Model):
 # ----------------------------
 class Producto(db.Model):
     __tablename__ = "producto"
+    __table_args__ = (
+        db.Index("ix_producto_categoria_nombre", "categoria", "nombre"),
+        db.Index("ix_producto_nombre", "nombre"),
+        db.Index("ix_producto_codigo", "codigo", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(120), nullable=False)
     categoria = db.Column(db.String(120))
+    codigo = db.Column(db.String(64))  # código de barras / SKU
     stock_minimo = db.Column(db.Integer, default=0)
     stock_actual = db.Column(db.Integer, default=0)
 
     # opcionales si quieres trazabilidad
     created_at = db.Column(db.DateTime(timezone=True), server_default=func.now())
 
-    # relaciones
-    entradas = relationship("Entrada", back_populates="producto", lazy="selectin")
-    salidas = relationship("Salida", back_populates="producto", lazy="selectin")
+    # relaciones (lazy: cada endpoint pide explícitamente lo que usa)
+    entradas = relationship("Entrada", back_populates="producto", lazy="select")
+    salidas = relationship("Salida", back_populates="producto", lazy="select")
 
     def to_dict(self):
         return {
             "id": self.id,
             "nombre": self.nombre,
             "categoria": self.categoria,
+            "codigo": self.codigo,
             "stock_minimo": self.stock_minimo,
             "stock_actual": self.stock_actual,
-            "created_at": iso(self.created_at),
+            "created_at": self.created_at,
         }
 
     def __repr__(self):
@@ -120,6 +151,11 @@ class Producto(db.Model):
 # ----------------------------
 class Entrada(db.Model):
     __tablename__ = "entrada"
+    __table_args__ = (
+        db.Index("ix_entrada_fecha_id", "fecha", "id"),
+        db.Index("ix_entrada_proveedor_fecha", "proveedor_id", "fecha", "id"),
+        db.Index("ix_entrada_producto_fecha", "producto_id", "fecha"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -129,8 +165,8 @@ class Entrada(db.Model):
 
     # Timestamps
     # Mantén 'fecha' si ya lo usas. Añadimos 'created_at' para orden estable desde BD.
-    fecha = db.Column(db.DateTime(timezone=True), server_default=func.now())
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    fecha = db.Column(db.DateTime(timezone=True), server_default=ahora())
+    created_at = db.Column(db.DateTime(timezone=True), server_default=ahora(), nullable=False)
 
     # Datos
     cantidad = db.Column(db.Integer, nullable=False)
@@ -156,19 +192,19 @@ class Entrada(db.Model):
     # descuento_importe = db.Column(db.Float)
 
     # relaciones
-    producto = relationship("Producto", back_populates="entradas", lazy="joined")
-    proveedor = relationship("Proveedor", back_populates="entradas", lazy="joined")
+    # lazy: los listados usan joinedload() cuando necesitan los nombres
+    producto = relationship("Producto", back_populates="entradas", lazy="select")
+    proveedor = relationship("Proveedor", back_populates="entradas", lazy="select")
 
     def to_dict(self):
         """
         Serialización consistente:
-        - Devuelve created_at (ISO) y alias fecha.
+        - Devuelve created_at y alias fecha (el proveedor JSON los emite en ISO).
         - 'numero_documento' usa 'numero_albaran' por compatibilidad con el frontend.
         - Incluye nombres relacionados (producto/proveedor) si están disponibles.
         """
         # elige fecha preferente
         dt = self.fecha or self.created_at
-        iso_dt = iso(dt)
 
         return {
             "id": self.id,
@@ -193,8 +229,8 @@ class Entrada(db.Model):
             "precio_con_iva": self.precio_con_iva,
 
             # Fechas
-            "created_at": iso_dt,
-            "fecha": iso_dt,  # alias que tu UI ya usa
+            "created_at": dt,
+            "fecha": dt,  # alias que tu UI ya usa
         }
 
     def __repr__(self):
@@ -206,11 +242,16 @@ class Entrada(db.Model):
 # ----------------------------
 class Salida(db.Model):
     __tablename__ = "salida"
+    __table_args__ = (
+        db.Index("ix_salida_fecha_id", "fecha", "id"),
+        db.Index("ix_salida_usuario_fecha", "usuario_id", "fecha", "id"),
+        db.Index("ix_salida_producto_fecha", "producto_id", "fecha", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # Mantén 'fecha' si ya lo usas; añadimos created_at para ordenar.
-    fecha = db.Column(db.DateTime(timezone=True), server_default=func.now())
-    created_at = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+    fecha = db.Column(db.DateTime(timezone=True), server_default=ahora())
+    created_at = db.Column(db.DateTime(timezone=True), server_default=ahora(), nullable=False)
 
     producto_id = db.Column(db.Integer, db.ForeignKey("producto.id"), nullable=False)
     usuario_id  = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -219,16 +260,16 @@ class Salida(db.Model):
     observaciones = db.Column(db.String(255))
 
     # relaciones
-    producto = relationship("Producto", back_populates="salidas", lazy="joined")
-    usuario = relationship("User", back_populates="salidas", lazy="joined")
+    # lazy: los listados usan joinedload() cuando necesitan los nombres
+    producto = relationship("Producto", back_populates="salidas", lazy="select")
+    usuario = relationship("User", back_populates="salidas", lazy="select")
 
     def to_dict(self):
         dt = self.fecha or self.created_at
-        iso_dt = iso(dt)
         return {
             "id": self.id,
-            "created_at": iso_dt,
-            "fecha": iso_dt,  # alias
+            "created_at": dt,
+            "fecha": dt,  # alias
             "producto_id": self.producto_id,
             "producto_nombre": getattr(self.producto, "nombre", None),
             "usuario_id": self.usuario_id,
@@ -241,6 +282,92 @@ class Salida(db.Model):
         return f"<Salida {self.id} prod={self.producto_id} cant={self.cantidad} usr={self.usuario_id}>"
 
 
+# ----------------------------
+# StockDiario (agregado por producto y día)
+# ----------------------------
+class StockDiario(db.Model):
+    """
+    Totales diarios de entradas y salidas por producto. Se actualiza en cada
+    movimiento (api/stock_diario.py) y se puede reconstruir desde el histórico
+    con `flask rebuild-stock-diario`.
+    """
+    __tablename__ = "stock_diario"
+
+    producto_id = db.Column(db.Integer, db.ForeignKey("producto.id"), primary_key=True)
+    dia = db.Column(db.Date, primary_key=True)
+    entradas = db.Column(db.Integer, nullable=False, default=0)
+    salidas = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_stock_diario_dia", "dia"),
+    )
+
+    def to_dict(self):
+        return {
+            "producto_id": self.producto_id,
+            "dia": self.dia,
+            "entradas": self.entradas,
+            "salidas": self.salidas,
+        }
+
+    def __repr__(self):
+        return f"<StockDiario prod={self.producto_id} {self.dia} +{self.entradas} -{self.salidas}>"
+
+
+# ----------------------------
+# StockSnapshot (foto periódica de stock_actual)
+# ----------------------------
+class StockSnapshot(db.Model):
+    """
+    stock_actual de cada producto en un instante. Se toma con
+    `flask stock-snapshot` (programado, p.ej. a diario) y acota el replay de
+    movimientos al reconstruir el stock en una fecha pasada.
+    """
+    __tablename__ = "stock_snapshot"
+
+    id = db.Column(db.Integer, primary_key=True)
+    producto_id = db.Column(db.Integer, db.ForeignKey("producto.id"), nullable=False)
+    fecha = db.Column(db.DateTime(timezone=True), server_default=ahora(), nullable=False)
+    stock = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_stock_snapshot_producto_fecha", "producto_id", "fecha"),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "producto_id": self.producto_id,
+            "fecha": self.fecha,
+            "stock": self.stock,
+        }
+
+    def __repr__(self):
+        return f"<StockSnapshot prod={self.producto_id} {self.fecha} stock={self.stock}>"
+
+
+# ----------------------------
+# CatalogoVersion (contador por tabla para ETags)
+# ----------------------------
+class CatalogoVersion(db.Model):
+    """Se incrementa en cada commit que modifica la tabla (api/catalog_cache.py)."""
+    __tablename__ = "catalogo_version"
+
+    tabla = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogoVersion {self.tabla} v{self.version}>"
+
+
+# En Postgres el contador de cada catálogo es una secuencia: nextval no
+# bloquea filas ni depende de la transacción (api/catalog_cache.py).
+CATALOGO_SECUENCIAS = {
+    tabla: db.Sequence(f"catalogo_version_{tabla}_seq", metadata=db.Model.metadata)
+    for tabla in ("producto", "proveedor", "maquinaria")
+}
+
+
 # ----------------------------
 # Maquinaria
 # ----------------------------
@@ -270,9 +397,9 @@ class Maquinaria(db.Model):
             "numero_serie": self.numero_serie,
             "ubicacion": self.ubicacion,
             "estado": self.estado,
-            "fecha_compra": iso(self.fecha_compra),
+            "fecha_compra": self.fecha_compra,
             "notas": self.notas,
-            "created_at": iso(self.created_at),
+            "created_at": self.created_at,
         }
 
     def __repr__(self):
@@ -0,0 +1,200 @@
+# src/api/profiler.py
+"""
+Perfilado de peticiones con muestreo de pila (formato flame graph).
+
+Un hilo muestreador lee periódicamente la pila de los hilos que atienden
+peticiones (sys._current_frames) y cuenta cada pila. No instrumenta el
+código: la petición perfilada apenas se ralentiza y las demás no se tocan.
+
+- A demanda: un administrador añade ?__profile=1 (o =speedscope) a
+  cualquier petición y recibe, en lugar de la respuesta, su perfil en
+  formato collapsed ("a;b;c N", para flamegraph.pl / speedscope) o en JSON
+  de speedscope. La petición se ejecuta igual (incluidas sus escrituras).
+- Siempre activo (si PROFILE_DIR está definido): se muestrean todas las
+  peticiones a PROFILE_INTERVAL_MS y se guardan en PROFILE_DIR las que
+  quedan en el 1% más lento de las últimas observadas.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from flask import Response, g, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+DEMAND_INTERVAL_MS = 1.0
+SLOW_QUANTILE = 0.99
+_WINDOW = 1000
+_MIN_OBS = 100
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame):
+    out = []
+    while frame is not None:
+        out.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    out.reverse()
+    return tuple(out)
+
+
+class Sampler:
+    """Muestrea las pilas de los hilos registrados cada 'interval_ms'."""
+
+    def __init__(self, interval_ms):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._active = {}  # thread id -> Counter(pila -> muestras)
+        self._thread = None
+
+    def _ensure_thread(self):
+        # tras el fork de gunicorn el hilo no existe: se arranca en el worker
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for tid, counts in self._active.items():
+                    f = frames.get(tid)
+                    if f is not None and tid != me:
+                        counts[_stack(f)] += 1
+
+    def start(self, tid=None):
+        with self._lock:
+            self._active[tid or threading.get_ident()] = Counter()
+        self._ensure_thread()
+
+    def stop(self, tid=None):
+        with self._lock:
+            return self._active.pop(tid or threading.get_ident(), Counter())
+
+
+def collapsed(counts):
+    """Formato collapsed: 'marco1;marco2;... muestras' por línea."""
+    return "".join(f"{';'.join(stack)} {n}\n" for stack, n in counts.most_common())
+
+
+def speedscope(counts, interval_ms, name):
+    """Perfil 'sampled' de speedscope (https://www.speedscope.app)."""
+    frames, index = [], {}
+    samples, weights = [], []
+    for stack, n in counts.items():
+        ids = []
+        for fr in stack:
+            if fr not in index:
+                index[fr] = len(frames)
+                frames.append({"name": fr})
+            ids.append(index[fr])
+        samples.append(ids)
+        weights.append(n * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled", "name": name, "unit": "milliseconds",
+            "startValue": 0, "endValue": sum(weights),
+            "samples": samples, "weights": weights,
+        }],
+        "exporter": "specialwash",
+    }
+
+
+class _SlowTracker:
+    """Umbral del percentil SLOW_QUANTILE sobre las últimas _WINDOW duraciones."""
+
+    def __init__(self):
+        self._durs = deque(maxlen=_WINDOW)
+        self._lock = threading.Lock()
+        self._threshold = None
+        self._n = 0
+
+    def is_slow(self, dur):
+        with self._lock:
+            self._durs.append(dur)
+            self._n += 1
+            if len(self._durs) >= _MIN_OBS and (self._threshold is None or self._n % 50 == 0):
+                s = sorted(self._durs)
+                self._threshold = s[int(len(s) * SLOW_QUANTILE)]
+            return self._threshold is not None and dur >= self._threshold
+
+
+def _is_admin():
+    from .routes import _normalize_role  # mismo criterio que role_required
+    try:
+        verify_jwt_in_request()
+    except Exception:
+        return False
+    return _normalize_role((get_jwt() or {}).get("rol")) == "administrador"
+
+
+def _store(counts, dur_ms):
+    ruta = re.sub(r"[^A-Za-z0-9_-]+", "_", request.path).strip("_") or "root"
+    nombre = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{request.method}-{ruta}-{dur_ms:.0f}ms.collapsed"
+    with open(os.path.join(PROFILE_DIR, nombre), "w", encoding="utf-8") as fh:
+        fh.write(collapsed(counts))
+
+
+def init_app(app):
+    demand = Sampler(DEMAND_INTERVAL_MS)
+    always = Sampler(INTERVAL_MS) if PROFILE_DIR else None
+    slow = _SlowTracker()
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    @app.before_request
+    def _profile_start():
+        modo = request.args.get("__profile")
+        if modo:
+            if not _is_admin():
+                return jsonify({"msg": "No autorizado"}), 403
+            g.profile_mode = modo
+            demand.start()
+        elif always is not None:
+            g.profile_t0 = time.perf_counter()
+            always.start()
+
+    @app.after_request
+    def _profile_stop(resp):
+        modo = g.pop("profile_mode", None)
+        if modo:
+            counts = demand.stop()
+            nombre = f"{request.method} {request.path}"
+            if modo == "speedscope":
+                out = jsonify(speedscope(counts, DEMAND_INTERVAL_MS, nombre))
+            else:
+                out = Response(collapsed(counts), mimetype="text/plain")
+            out.headers["X-Profile-Status"] = str(resp.status_code)
+            return out
+
+        t0 = g.pop("profile_t0", None)
+        if t0 is not None:
+            counts = always.stop()
+            dur = time.perf_counter() - t0
+            if slow.is_slow(dur) and counts:
+                try:
+                    _store(counts, dur * 1000)
+                except OSError as e:
+                    app.logger.warning("No se pudo guardar el perfil: %s", e)
+        return resp
+
+    @app.teardown_request
+    def _profile_cleanup(_exc):
+        # si la petición terminó en excepción no pasó por after_request
+        if g.pop("profile_mode", None):
+            demand.stop()
+        if g.pop("profile_t0", None) is not None:
+            always.stop()
@@ -0,0 +1,94 @@
+# src/api/reconcile.py
+"""
+Conciliación de stock_actual con el libro de movimientos.
+
+stock_actual se modifica directamente (entradas, salidas, edición del admin),
+así que puede separarse de sum(entradas) - sum(salidas). Aquí se compara todo
+el catálogo en una sola consulta agrupada y, si se pide, se corrige con un
+único UPDATE sobre los productos desviados, bloqueados antes en orden de id.
+"""
+from sqlalchemy import func, select, update
+
+from .models import db, Producto, Entrada, Salida
+from . import catalog_cache, suggest
+
+
+def _totales(model):
+    return (
+        select(model.producto_id.label("producto_id"), func.sum(model.cantidad).label("total"))
+        .group_by(model.producto_id)
+        .subquery()
+    )
+
+
+def _ledger_scalar(model):
+    """sum(cantidad) del producto de la fila exterior (subconsulta correlacionada)."""
+    return (
+        select(func.coalesce(func.sum(model.cantidad), 0))
+        .where(model.producto_id == Producto.id)
+        .scalar_subquery()
+    )
+
+
+def drift():
+    """
+    Productos cuyo stock_actual no coincide con entradas - salidas.
+    Una sola consulta: producto LEFT JOIN totales agrupados de entrada y salida.
+    """
+    ent = _totales(Entrada)
+    sal = _totales(Salida)
+    stock = func.coalesce(Producto.stock_actual, 0)
+    ledger = func.coalesce(ent.c.total, 0) - func.coalesce(sal.c.total, 0)
+
+    q = (
+        select(Producto.id, Producto.nombre, stock.label("stock_actual"), ledger.label("ledger"))
+        .outerjoin(ent, ent.c.producto_id == Producto.id)
+        .outerjoin(sal, sal.c.producto_id == Producto.id)
+        .where(stock != ledger)
+        .order_by(Producto.id)
+    )
+    return [
+        {
+            "producto_id": pid,
+            "nombre": nombre,
+            "stock_actual": actual,
+            "ledger": led,
+            "diferencia": actual - led,
+        }
+        for pid, nombre, actual, led in db.session.execute(q)
+    ]
+
+
+def repair(ids=None):
+    """
+    Fija stock_actual = entradas - salidas en los productos con desviación
+    ('ids', si ya se han sacado de drift(); si no, se calculan aquí).
+    Devuelve el nº de productos corregidos.
+
+    Antes del UPDATE bloquea esos productos en orden de id, como el resto de
+    escritores de stock: en READ COMMITTED, una salida o entrada que se
+    confirmara entre el cálculo del libro y la escritura quedaría pisada por
+    una suma ya vieja. Con el lock tomado, el UPDATE (una sentencia nueva,
+    con su propia instantánea) ve todos los movimientos confirmados y los
+    que lleguen después esperan a este commit.
+    """
+    if ids is None:
+        ids = [d["producto_id"] for d in drift()]
+    if not ids:
+        db.session.rollback()
+        return 0
+
+    db.session.execute(
+        select(Producto.id).where(Producto.id.in_(ids)).order_by(Producto.id).with_for_update()
+    )
+    ledger = _ledger_scalar(Entrada) - _ledger_scalar(Salida)
+    res = db.session.execute(
+        update(Producto.__table__)
+        .where(Producto.id.in_(ids), func.coalesce(Producto.stock_actual, 0) != ledger)
+        .values(stock_actual=ledger)
+        .execution_options(synchronize_session=False)
+    )
+    catalog_cache.touch("producto")
+    suggest.mark_stale()
+    db.session.commit()
+    return res.rowcount
@@ -1,15 +1,23 @@
 # src/api/routes.py
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
 from flask_jwt_extended import (
     create_access_token, jwt_required, get_jwt, get_jwt_identity
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime
-from sqlalchemy import func, desc
-
-from .models import db, User, Producto, Proveedor, Entrada, Salida, Maquinaria
+from datetime import datetime, date, time
+from sqlalchemy import func, desc, or_, and_, bindparam, select, update
+import base64
+import csv
+import io
+import json
+import os
+from sqlalchemy.orm import joinedload
+
+from .models import db, User, Producto, Proveedor, Entrada, Salida, Maquinaria, iso
+from .csv_import import import_entradas, CSVImportError
+from . import stock_diario, snapshots, reconcile, catalog_cache, search, suggest, fieldsets
 
 api = Blueprint("api", __name__)
 
@@ -28,6 +36,103 @@ def _parse_date(s):
             pass
     return None
 
+# Relaciones que serializa el listado completo, en un único SELECT (sin N+1)
+_ENTRADA_LOAD = (joinedload(Entrada.producto), joinedload(Entrada.proveedor))
+_SALIDA_LOAD = (joinedload(Salida.producto), joinedload(Salida.usuario))
+
+# --- Paginación keyset (cursor) para historiales ---
+_PAGE_DEFAULT = 50
+_PAGE_MAX = 500
+
+def _despues_de(model, c_fecha, c_id):
+    """
+    Filas que van detrás de (c_fecha, c_id) en el orden (fecha DESC, id DESC).
+    Compara la columna tal cual, así que la sirven los índices (…, fecha, id):
+    el cursor se enlaza como DateTime y sale en el mismo formato que la
+    columna (en SQLite el texto de SQLAlchemy; ver models.ahora).
+    Los NULL ordenan como el valor más alto en Postgres y el más bajo en
+    SQLite, así que un fecha NULL en el cursor o detrás de él depende del motor.
+    """
+    nulls_altos = db.engine.dialect.name == "postgresql"
+    if c_fecha is None:
+        crit = and_(model.fecha.is_(None), model.id < c_id)
+        return or_(model.fecha.isnot(None), crit) if nulls_altos else crit
+    c = bindparam("c_fecha", c_fecha, type_=db.DateTime(timezone=True))
+    crit = or_(model.fecha < c, and_(model.fecha == c, model.id < c_id))
+    return crit if nulls_altos else or_(crit, model.fecha.is_(None))
+
+def _encode_cursor(dt, row_id):
+    raw = json.dumps([dt.isoformat() if dt else None, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor):
+    """Devuelve (datetime o None, id) o lanza ValueError si el cursor no es válido."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        fecha, row_id = json.loads(raw)
+        return (datetime.fromisoformat(fecha) if fecha is not None else None), int(row_id)
+    except Exception:
+        raise ValueError("cursor inválido")
+
+def _wants_page():
+    """Sin limit ni cursor se mantiene el listado completo (UI actual)."""
+    return "limit" in request.args or "cursor" in request.args
+
+def _keyset_page(q, model, serialize, cursor_key=None):
+    """
+    Página ordenada por (fecha, id) descendente. El coste no depende de la
+    posición: se filtra por la clave del último elemento, sin OFFSET.
+    cursor_key(fila) -> (fecha, id) para filas que no son objetos del modelo.
+    """
+    try:
+        limit = int(request.args.get("limit") or _PAGE_DEFAULT)
+    except ValueError:
+        return jsonify({"msg": "limit inválido"}), 400
+    limit = max(1, min(limit, _PAGE_MAX))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            c_fecha, c_id = _decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
+        q = q.filter(_despues_de(model, c_fecha, c_id))
+
+    rows = q.order_by(model.fecha.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(*(cursor_key(last) if cursor_key else (last.fecha, last.id)))
+
+    return jsonify({"items": [serialize(r) for r in rows], "next_cursor": next_cursor}), 200
+
+def _listado(recurso, q, serialize, model=None, order=(), load=()):
+    """
+    Respuesta común de los listados:
+    - ?fields=a,b,c -> proyección de esas columnas (api/fieldsets.py), sin ORM.
+    - ?limit/?cursor -> página keyset (si el recurso tiene 'model' paginable).
+    - si no, el listado completo con 'order' y las relaciones de 'load'.
+    """
+    try:
+        names = fieldsets.requested(recurso)
+    except fieldsets.FieldsError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    paginar = model is not None and _wants_page()
+    cursor_key = None
+    if names:
+        q = fieldsets.project(q, recurso, names, keyset_model=model if paginar else None)
+        serialize, cursor_key = fieldsets.serializer(names), fieldsets.cursor_key
+    elif load:
+        q = q.options(*load)
+
+    if paginar:
+        return _keyset_page(q, model, serialize, cursor_key)
+    if order:
+        q = q.order_by(*order)
+    return jsonify([serialize(r) for r in q.all()]), 200
+
 def _normalize_role(r):
     r = (r or "").lower().strip()
     if r in ("admin", "administrator"):
@@ -118,7 +223,7 @@ def logout():
 @api.route("/usuarios", methods=["GET"])
 @role_required("administrador")
 def usuarios_list():
-    return jsonify([u.to_dict() for u in User.query.order_by(User.id.desc()).all()])
+    return _listado("usuario", User.query, User.to_dict, order=(User.id.desc(),))
 
 
 @api.route("/usuarios", methods=["POST"])
@@ -198,7 +303,9 @@ def usuarios_delete(uid):
 @api.route("/proveedores", methods=["GET"])
 @jwt_required()
 def proveedores_list():
-    return jsonify([p.to_dict() for p in Proveedor.query.order_by(Proveedor.nombre).all()])
+    return catalog_cache.conditional("proveedor", lambda: _listado(
+        "proveedor", Proveedor.query, Proveedor.to_dict, order=(Proveedor.nombre,)
+    ))
 
 
 @api.route("/proveedores", methods=["POST"])
@@ -258,17 +365,16 @@ def proveedores_delete(pid):
 @api.route("/productos", methods=["GET"])
 @jwt_required()
 def productos_list():
+    return catalog_cache.conditional("producto", _productos_list)
+
+
+def _productos_list():
     bajo_stock = (request.args.get("bajo_stock", "").lower() in ("1","true","yes"))
     q = (request.args.get("q") or "").strip().lower()
     categoria = (request.args.get("categoria") or "").strip()
 
     query = Producto.query
 
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            (Producto.nombre.ilike(like)) | (Producto.categoria.ilike(like))
-        )
     if categoria:
         query = query.filter(Producto.categoria == categoria)
 
@@ -276,8 +382,24 @@ def productos_list():
         # incluye “en el mínimo”
         query = query.filter(Producto.stock_actual <= Producto.stock_minimo)
 
-    items = query.order_by(Producto.nombre).all()
-    return jsonify([p.to_dict() for p in items])
+    # con q: filtro indexado y orden por relevancia (api/search.py)
+    query = search.apply(query, q) if q else query.order_by(Producto.nombre)
+    return _listado("producto", query, Producto.to_dict)
+
+
+@api.route("/productos/suggest", methods=["GET"])
+@jwt_required()
+def productos_suggest():
+    """
+    Autocompletado: ?prefix=...&k=10. Se sirve del índice en memoria
+    (api/suggest.py), con stock_actual incluido; no consulta la BD por tecla.
+    """
+    prefix = (request.args.get("prefix") or "").strip()
+    try:
+        k = max(1, min(int(request.args.get("k") or 10), 50))
+    except ValueError:
+        return jsonify({"msg": "k inválido"}), 400
+    return jsonify(suggest.index.suggest(prefix, k)), 200
 
 
 @api.route("/productos", methods=["POST"])
@@ -287,6 +409,7 @@ def productos_create():
     p = Producto(
         nombre=(data.get("nombre") or "").strip(),
         categoria=(data.get("categoria") or "").strip() or None,
+        codigo=(data.get("codigo") or "").strip() or None,
         stock_minimo=int(data.get("stock_minimo") or 0),
         stock_actual=int(data.get("stock_actual") or 0),
     )
@@ -294,6 +417,8 @@ def productos_create():
         return jsonify({"msg": "Nombre requerido"}), 400
     if p.stock_minimo < 0 or p.stock_actual < 0:
         return jsonify({"msg": "Stock no puede ser negativo"}), 422
+    if p.codigo and Producto.query.filter_by(codigo=p.codigo).first():
+        return jsonify({"msg": "Código ya existe"}), 400
     db.session.add(p)
     db.session.commit()
     return jsonify(p.to_dict()), 201
@@ -316,6 +441,13 @@ def productos_update(pid):
     if "categoria" in data:
         p.categoria = (data.get("categoria") or "").strip() or None
 
+    # código de barras / SKU (opcional, único)
+    if "codigo" in data:
+        codigo = (data.get("codigo") or "").strip() or None
+        if codigo and codigo != p.codigo and Producto.query.filter_by(codigo=codigo).first():
+            return jsonify({"msg": "Código ya existe"}), 400
+        p.codigo = codigo
+
     # stock_minimo
     if "stock_minimo" in data:
         try:
@@ -340,6 +472,40 @@ def productos_update(pid):
     return jsonify(p.to_dict()), 200
 
 
+@api.route("/productos/by-code/<path:codigo>", methods=["GET"])
+@jwt_required()
+def producto_by_code(codigo):
+    """Producto por código de barras / SKU (índice único sobre 'codigo')."""
+    p = Producto.query.filter_by(codigo=codigo.strip()).first()
+    if not p:
+        return jsonify({"msg": "Producto no existe"}), 404
+    return jsonify(p.to_dict()), 200
+
+
+@api.route("/productos/<int:pid>/stock", methods=["GET"])
+@jwt_required()
+def producto_stock_at(pid):
+    """
+    Stock del producto en una fecha pasada: ?at=YYYY-MM-DD (fin del día)
+    o ?at=<ISO datetime>. Parte de la foto más cercana (ver api/snapshots.py).
+    """
+    p = Producto.query.get_or_404(pid)
+    raw = (request.args.get("at") or "").strip()
+    if not raw:
+        return jsonify({"at": None, "stock": p.stock_actual, "producto_id": p.id}), 200
+
+    d = _parse_date(raw)
+    if d:
+        at = datetime.combine(d, time.max)
+    else:
+        try:
+            at = datetime.fromisoformat(raw)
+        except ValueError:
+            return jsonify({"msg": "at inválido (YYYY-MM-DD o ISO 8601)"}), 400
+
+    return jsonify(snapshots.stock_at(p, at)), 200
+
+
 @api.route("/productos/<int:pid>", methods=["DELETE"])
 @role_required("administrador")
 def productos_delete(pid):
@@ -363,11 +529,17 @@ def registrar_entrada():
         return jsonify({"msg": "Datos inválidos"}), 400
 
     with db.session.begin():
-        prod = db.session.query(Producto).with_for_update().get(producto_id)
-        if not prod:
+        # Suma atómica en la BD: con un read-modify-write dos entradas
+        # concurrentes sobre SQLite (que ignora FOR UPDATE) perdían una.
+        res = db.session.execute(
+            update(Producto.__table__)
+            .where(Producto.id == producto_id)
+            .values(stock_actual=func.coalesce(Producto.stock_actual, 0) + cantidad)
+        )
+        if res.rowcount != 1:
             return jsonify({"msg": "Producto no existe"}), 404
-
-        prod.stock_actual = (prod.stock_actual or 0) + cantidad
+        catalog_cache.touch("producto")
+        stock_diario.acumular_entrada(producto_id, cantidad)
 
         ent = Entrada(
             producto_id=producto_id,
@@ -380,48 +552,137 @@ def registrar_entrada():
             precio_con_iva=data.get("precio_con_iva"),
         )
         db.session.add(ent)
+        db.session.flush()
+        prod = db.session.query(Producto).populate_existing().get(producto_id)
+        suggest.note_stock(prod.id, prod.stock_actual)
+        # antes del commit, que expira ambos objetos
+        body = {"entrada_id": ent.id, "producto": prod.to_dict()}
 
-    return jsonify({"entrada_id": ent.id, "producto": prod.to_dict()}), 201
+    return jsonify(body), 201
 
 
-@api.route("/registro-entrada", methods=["GET"])
-@jwt_required()
-def entradas_list():
+@api.route("/registro-entrada/import", methods=["POST"])
+@role_required("administrador")
+def importar_entradas():
+    """
+    Importa un CSV de líneas de albarán (multipart 'file' o body text/csv).
+    Todo o nada: si hay líneas inválidas responde 400 con el detalle.
+    """
+    f = request.files.get("file")
+    raw = f.stream if f else request.stream
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+    try:
+        res = import_entradas(stream)
+    except CSVImportError as e:
+        return jsonify({"msg": str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({"msg": "El CSV debe estar en UTF-8"}), 400
+    return jsonify(res), (201 if res["ok"] else 400)
+
+
+def _entradas_filtros():
+    """Filtros de ?desde, ?hasta y ?proveedor_id (listado y export)."""
     desde = request.args.get("desde")
     hasta = request.args.get("hasta")
     proveedor_id = request.args.get("proveedor_id")
 
-    q = Entrada.query
+    crit = []
     if proveedor_id:
-        q = q.filter(Entrada.proveedor_id == int(proveedor_id))
+        crit.append(Entrada.proveedor_id == int(proveedor_id))
     if desde:
-        q = q.filter(Entrada.fecha >= f"{desde} 00:00:00")
+        crit.append(Entrada.fecha >= f"{desde} 00:00:00")
     if hasta:
-        q = q.filter(Entrada.fecha <= f"{hasta} 23:59:59")
-
-    q = q.order_by(desc(func.coalesce(Entrada.fecha, Entrada.created_at)))
-    data = []
-    for e in q.all():
-        data.append({
-            "id": e.id,
-            "fecha": e.fecha.isoformat() if e.fecha else None,
-            "created_at": e.created_at.isoformat() if getattr(e, "created_at", None) else None,
-            "cantidad": e.cantidad,
-            "numero_albaran": e.numero_albaran,
-            "precio_sin_iva": e.precio_sin_iva,
-            "porcentaje_iva": e.porcentaje_iva,
-            "valor_iva": e.valor_iva,
-            "precio_con_iva": e.precio_con_iva,
-            "producto": Producto.query.get(e.producto_id).to_dict() if e.producto_id else None,
-            "proveedor": Proveedor.query.get(e.proveedor_id).to_dict() if e.proveedor_id else None,
-        })
+        crit.append(Entrada.fecha <= f"{hasta} 23:59:59.999999")
+    return crit
 
-    return jsonify(data), 200
+
+@api.route("/registro-entrada", methods=["GET"])
+@jwt_required()
+def entradas_list():
+    q = Entrada.query.filter(*_entradas_filtros())
+    return _listado(
+        "entrada", q, _entrada_item, model=Entrada,
+        order=(desc(func.coalesce(Entrada.fecha, Entrada.created_at)),), load=_ENTRADA_LOAD,
+    )
+
+
+def _entrada_item(e):
+    return {
+        "id": e.id,
+        "fecha": e.fecha.isoformat() if e.fecha else None,
+        "created_at": e.created_at.isoformat() if getattr(e, "created_at", None) else None,
+        "cantidad": e.cantidad,
+        "numero_albaran": e.numero_albaran,
+        "precio_sin_iva": e.precio_sin_iva,
+        "porcentaje_iva": e.porcentaje_iva,
+        "valor_iva": e.valor_iva,
+        "precio_con_iva": e.precio_con_iva,
+        "producto": e.producto.to_dict() if e.producto else None,
+        "proveedor": e.proveedor.to_dict() if e.proveedor else None,
+    }
 
 
 # ==========================
 # SALIDAS (restan stock)
 # ==========================
+def _salida_usuario_id(data):
+    """
+    Usuario al que se imputa la salida: el del token, o el 'usuario_id'
+    explícito si quien registra es administrador. Devuelve (uid, error).
+    """
+    try:
+        uid = int(get_jwt_identity())
+    except (TypeError, ValueError):
+        return None, (jsonify({"msg": "Token inválido"}), 401)
+
+    claims = get_jwt() or {}
+    rol = _normalize_role(claims.get("rol"))
+
+    # Si es admin y manda usuario_id explícito
+    if rol == "administrador" and data.get("usuario_id") is not None:
+        try:
+            uid_override = int(data["usuario_id"])
+        except (TypeError, ValueError):
+            return None, (jsonify({"msg": "usuario_id inválido"}), 400)
+        target = User.query.get(uid_override)
+        if not target:
+            return None, (jsonify({"msg": "Usuario no existe"}), 404)
+        uid = target.id
+
+    return uid, None
+
+
+def _descontar_stock(match, qty, uid):
+    """
+    UPDATE producto SET stock_actual = stock_actual - :qty
+    WHERE <match> AND stock_actual >= :qty RETURNING ...
+
+    'match' identifica el producto (Producto.id == pid o Producto.codigo == c).
+    Devuelve la fila del producto ya actualizada (más el nombre del usuario
+    'uid') o None si el producto no existe o no tiene stock suficiente.
+    """
+    cols = list(Producto.__table__.c)
+    usuario_nombre = (
+        select(User.nombre).where(User.id == uid).scalar_subquery().label("usuario_nombre")
+    )
+    stmt = (
+        update(Producto.__table__)
+        .where(match, Producto.stock_actual >= qty)
+        .values(stock_actual=Producto.stock_actual - qty)
+    )
+    catalog_cache.touch("producto")
+    if db.engine.dialect.full_returning:
+        return db.session.execute(stmt.returning(*cols, usuario_nombre)).first()
+
+    # Sin RETURNING (SQLite con SQLAlchemy 1.4): la lectura va en la misma
+    # transacción, que ya tiene el lock de escritura tras el UPDATE.
+    if db.session.execute(stmt).rowcount != 1:
+        return None
+    return db.session.execute(
+        select(*cols, usuario_nombre).where(match)
+    ).first()
+
+
 @api.route("/registro-salida", methods=["POST"])
 @role_required("administrador", "empleado", "encargado")
 def registrar_salida():
@@ -429,47 +690,37 @@ def registrar_salida():
         data = request.get_json(silent=True) or {}
 
         # --- Datos de entrada ---
+        # El producto llega por producto_id o por 'codigo' (lector de códigos de barras)
+        codigo = (data.get("codigo") or "").strip() if data.get("producto_id") is None else ""
         try:
-            pid = int(data.get("producto_id"))
+            pid = int(data.get("producto_id")) if not codigo else None
             qty = int(data.get("cantidad") or 0)
         except (TypeError, ValueError):
             return jsonify({"msg": "producto_id y cantidad deben ser enteros"}), 400
 
         obs = (data.get("observaciones") or "").strip()
-        if pid <= 0 or qty <= 0:
+        if (pid is not None and pid <= 0) or qty <= 0:
             return jsonify({"msg": "Datos inválidos"}), 400
+        match = (Producto.codigo == codigo) if codigo else (Producto.id == pid)
 
         # --- Identidad / rol ---
-        ident = get_jwt_identity()
-        try:
-            uid = int(ident)
-        except (TypeError, ValueError):
-            return jsonify({"msg": "Token inválido"}), 401
-
-        claims = get_jwt() or {}
-        rol = _normalize_role(claims.get("rol"))
-
-        # Si es admin y manda usuario_id explícito
-        if rol == "administrador" and data.get("usuario_id") is not None:
-            try:
-                uid_override = int(data["usuario_id"])
-            except (TypeError, ValueError):
-                return jsonify({"msg": "usuario_id inválido"}), 400
-            target = User.query.get(uid_override)
-            if not target:
-                return jsonify({"msg": "Usuario no existe"}), 404
-            uid = target.id
+        uid, err = _salida_usuario_id(data)
+        if err:
+            return err
 
         # --- Lógica principal ---
-        prod = Producto.query.with_for_update().filter_by(id=pid).first()
-        if not prod:
-            return jsonify({"msg": "Producto no existe"}), 404
-
-        stock_actual = int(prod.stock_actual or 0)
-        if stock_actual < qty:
+        # Descuento atómico: el UPDATE solo afecta a la fila si hay stock,
+        # así que no hace falta leerla antes ni bloquearla (vale también en SQLite).
+        row = _descontar_stock(match, qty, uid)
+        if row is None:
+            db.session.rollback()
+            if not db.session.query(Producto.id).filter(match).first():
+                return jsonify({"msg": "Producto no existe"}), 404
             return jsonify({"msg": "Stock insuficiente"}), 400
+        pid = row.id
 
-        prod.stock_actual = stock_actual - qty
+        stock_diario.acumular_salida(pid, qty)
+        suggest.note_stock(pid, row.stock_actual)
 
         sal = Salida(
             producto_id=pid,
@@ -478,17 +729,17 @@ def registrar_salida():
             observaciones=obs
         )
         db.session.add(sal)
+        db.session.flush()
+        salida_id = sal.id
         db.session.commit()  # ✅ commit explícito
 
-        u = User.query.get(uid)
+        fila = dict(row._mapping)
+        usuario_nombre = fila.pop("usuario_nombre")
         return jsonify({
-            "salida_id": sal.id,
-            "producto": prod.to_dict() if hasattr(prod, "to_dict") else {
-                "id": prod.id,
-                "stock_actual": prod.stock_actual
-            },
+            "salida_id": salida_id,
+            "producto": Producto(**fila).to_dict(),
             "usuario_id": uid,
-            "usuario_nombre": getattr(u, "nombre", None)
+            "usuario_nombre": usuario_nombre
         }), 201
 
     except IntegrityError as e:
@@ -500,10 +751,142 @@ def registrar_salida():
         return jsonify({"msg": "Error interno registrando salida", "detail": str(e)}), 500
 
 
+_LOTE_MAX_LINEAS = 500
+
+def _insertar_salidas(filas):
+    """INSERT multi-fila de salidas; devuelve sus ids en el orden de 'filas'."""
+    stmt = Salida.__table__.insert().values(filas)
+    if db.engine.dialect.full_returning:
+        return [r.id for r in db.session.execute(stmt.returning(Salida.id))]
+    # SQLite: un INSERT asigna rowids consecutivos bajo el lock de escritura
+    last = db.session.execute(stmt).lastrowid
+    return list(range(last - len(filas) + 1, last + 1))
+
+def _errores_stock_lote(parsed):
+    """
+    Detalle por línea de un lote rechazado (tras el rollback): producto
+    inexistente o stock insuficiente con las cantidades acumuladas.
+    """
+    ids = sorted({pid for _, pid, _, _ in parsed})
+    restante = dict(db.session.execute(
+        select(Producto.id, Producto.stock_actual).where(Producto.id.in_(ids))
+    ).all())
+    errores = []
+    for i, pid, qty, _ in parsed:
+        if pid not in restante:
+            errores.append({"linea": i, "msg": "Producto no existe"})
+        elif (restante[pid] or 0) < qty:
+            errores.append({"linea": i, "msg": "Stock insuficiente", "disponible": restante[pid] or 0})
+        else:
+            restante[pid] -= qty
+    # vacío solo si el stock cambió entre el UPDATE y esta lectura
+    return errores or [{"msg": "Stock modificado durante el lote, reintentar"}]
+
+@api.route("/registro-salida/lote", methods=["POST"])
+@role_required("administrador", "empleado", "encargado")
+def registrar_salidas_lote():
+    """
+    Registra N salidas en una sola transacción (todo o nada).
+    Body: {"lineas": [{"producto_id", "cantidad", "observaciones"?}, ...], "usuario_id"?}
+    El stock se descuenta con un UPDATE condicional por producto, en orden de
+    id, y las salidas se insertan en un único INSERT.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        lineas = data.get("lineas")
+        if not isinstance(lineas, list) or not lineas:
+            return jsonify({"msg": "lineas debe ser una lista no vacía"}), 400
+        if len(lineas) > _LOTE_MAX_LINEAS:
+            return jsonify({"msg": f"Máximo {_LOTE_MAX_LINEAS} líneas por lote"}), 400
+
+        uid, err = _salida_usuario_id(data)
+        if err:
+            return err
+
+        # --- Validación de forma, línea a línea ---
+        errores = []
+        parsed = []
+        for i, ln in enumerate(lineas):
+            try:
+                pid = int((ln or {}).get("producto_id"))
+                qty = int((ln or {}).get("cantidad") or 0)
+            except (TypeError, ValueError, AttributeError):
+                errores.append({"linea": i, "msg": "producto_id y cantidad deben ser enteros"})
+                continue
+            if pid <= 0 or qty <= 0:
+                errores.append({"linea": i, "msg": "Datos inválidos"})
+                continue
+            obs = ln.get("observaciones")
+            if obs is not None and not isinstance(obs, str):
+                errores.append({"linea": i, "msg": "observaciones debe ser texto"})
+                continue
+            parsed.append((i, pid, qty, (obs or "").strip()))
+        if errores:
+            return jsonify({"msg": "Lote rechazado", "errores": errores}), 400
+
+        # --- Descuento atómico por producto, en orden de id ---
+        # Igual que registrar_salida: el UPDATE solo afecta a la fila si hay
+        # stock, así que vale también en SQLite (que ignora FOR UPDATE). En
+        # Postgres los locks se toman en orden de id y dos lotes concurrentes
+        # no pueden interbloquearse.
+        # Un único executemany: el driver ejecuta un UPDATE por producto en el
+        # orden de la lista y rowcount suma las filas afectadas.
+        totales = {}
+        for _, pid, qty, _ in parsed:
+            totales[pid] = totales.get(pid, 0) + qty
+        ids = sorted(totales)
+        res = db.session.execute(
+            update(Producto.__table__)
+            .where(Producto.id == bindparam("b_id"), Producto.stock_actual >= bindparam("b_qty"))
+            .values(stock_actual=Producto.stock_actual - bindparam("b_qty")),
+            [{"b_id": pid, "b_qty": totales[pid]} for pid in ids],
+        )
+        if res.rowcount != len(ids):
+            db.session.rollback()
+            return jsonify({"msg": "Lote rechazado", "errores": _errores_stock_lote(parsed)}), 400
+        catalog_cache.touch("producto")
+        stock_diario.acumular({pid: (0, total) for pid, total in totales.items()})
+
+        # --- Todas las líneas en un único INSERT ---
+        filas = [
+            {"producto_id": pid, "usuario_id": uid, "cantidad": qty, "observaciones": obs}
+            for _, pid, qty, obs in parsed
+        ]
+        salida_ids = _insertar_salidas(filas)
+
+        prods = (
+            Producto.query.filter(Producto.id.in_(ids)).order_by(Producto.id)
+            .populate_existing().all()
+        )
+        for p in prods:
+            suggest.note_stock(p.id, p.stock_actual)
+        # serializa antes del commit: después todo está expirado y se recargaría fila a fila
+        resultado = {
+            "salida_ids": salida_ids,
+            "productos": [p.to_dict() for p in prods],
+            "usuario_id": uid,
+        }
+        db.session.commit()
+
+        return jsonify(resultado), 201
+
+    except IntegrityError as e:
+        db.session.rollback()
+        return jsonify({"msg": "Error de integridad", "detail": str(e)}), 400
+    except Exception as e:
+        current_app.logger.exception("registrar_salidas_lote failed")
+        db.session.rollback()
+        return jsonify({"msg": "Error interno registrando salidas", "detail": str(e)}), 500
+
+
 @api.route("/registro-salida", methods=["GET"])
 @jwt_required()
 def salidas_list():
-    """Listado simple (orden por fecha). Admin ve todas; empleado/encargado solo las suyas."""
+    """
+    Listado simple (orden por fecha). Admin ve todas; empleado/encargado solo las suyas.
+    Con ?limit=N (y ?cursor=...) devuelve {items, next_cursor} paginado por (fecha, id).
+    Con ?fields=fecha,producto_nombre,cantidad devuelve solo esos campos.
+    """
     claims = get_jwt() or {}
     rol = _normalize_role(claims.get("rol"))
     uid = int(get_jwt_identity())
@@ -512,21 +895,14 @@ def salidas_list():
     if rol in ("empleado", "encargado"):
         q = q.filter(Salida.usuario_id == uid)
 
-    q = q.order_by(Salida.fecha.desc())
-    data = []
-    for s in q.all():
-        data.append({
-            **s.to_dict(),
-            "producto_nombre": Producto.query.get(s.producto_id).nombre if s.producto_id else None,
-            "usuario_nombre":  User.query.get(s.usuario_id).nombre  if s.usuario_id  else None,
-        })
-    return jsonify(data), 200
+    return _listado("salida", q, Salida.to_dict, model=Salida, order=(Salida.fecha.desc(),), load=_SALIDA_LOAD)
 
 
-@api.route("/salidas", methods=["GET"])
-@jwt_required()
-def salidas_historial():
-    """Historial con filtros. Admin ve todas; empleado/encargado solo sus propias salidas."""
+def _salidas_filtros():
+    """
+    Filtros de ?desde, ?hasta y ?producto_id más la restricción por rol
+    (empleado/encargado solo ven las suyas). Historial y export.
+    """
     claims = get_jwt() or {}
     rol = _normalize_role(claims.get("rol"))
     uid = int(get_jwt_identity())
@@ -535,36 +911,178 @@ def salidas_historial():
     hasta = request.args.get("hasta")
     producto_id = request.args.get("producto_id")
 
-    q = Salida.query
+    crit = []
     if producto_id:
-        q = q.filter(Salida.producto_id == int(producto_id))
+        crit.append(Salida.producto_id == int(producto_id))
     if desde:
-        q = q.filter(Salida.fecha >= f"{desde} 00:00:00")
+        crit.append(Salida.fecha >= f"{desde} 00:00:00")
     if hasta:
-        q = q.filter(Salida.fecha <= f"{hasta} 23:59:59")
+        crit.append(Salida.fecha <= f"{hasta} 23:59:59.999999")
 
     if rol in ("empleado", "encargado"):
-        q = q.filter(Salida.usuario_id == uid)
+        crit.append(Salida.usuario_id == uid)
+    return crit
+
+
+@api.route("/salidas", methods=["GET"])
+@jwt_required()
+def salidas_historial():
+    """
+    Historial con filtros. Admin ve todas; empleado/encargado solo sus propias salidas.
+    Con ?limit=N (y ?cursor=...) devuelve {items, next_cursor} paginado por (fecha, id).
+    Con ?fields=fecha,producto_nombre,cantidad devuelve solo esos campos.
+    """
+    q = Salida.query.filter(*_salidas_filtros())
+    return _listado("salida", q, Salida.to_dict, model=Salida, order=(Salida.fecha.desc(),), load=_SALIDA_LOAD)
+
 
-    q = q.order_by(Salida.fecha.desc())
-    data = []
-    for s in q.all():
-        data.append({
-            **s.to_dict(),
-            "producto_nombre": Producto.query.get(s.producto_id).nombre if s.producto_id else None,
-            "usuario_nombre":  User.query.get(s.usuario_id).nombre  if s.usuario_id  else None,
-        })
+# ==========================
+# CONCILIACIÓN de stock con el libro (solo admin)
+# ==========================
+@api.route("/stock/conciliacion", methods=["GET"])
+@role_required("administrador")
+def stock_conciliacion():
+    """Productos cuyo stock_actual difiere de entradas - salidas."""
+    items = reconcile.drift()
+    return jsonify({"desviaciones": len(items), "items": items}), 200
+
+
+@api.route("/stock/conciliacion", methods=["POST"])
+@role_required("administrador")
+def stock_conciliacion_reparar():
+    """Corrige stock_actual = entradas - salidas en todo el catálogo (un UPDATE)."""
+    items = reconcile.drift()
+    corregidos = reconcile.repair([it["producto_id"] for it in items]) if items else 0
+    return jsonify({"corregidos": corregidos, "items": items}), 200
+
+
+# ==========================
+# CONSUMO (desde el agregado stock_diario)
+# ==========================
+@api.route("/consumo", methods=["GET"])
+@jwt_required()
+def consumo():
+    """
+    Entradas/salidas por periodo leídas de stock_diario (coste O(días)).
+    ?desde=YYYY-MM-DD&hasta=YYYY-MM-DD&producto_id=&agrupar=dia|semana|mes
+    """
+    agrupar = (request.args.get("agrupar") or "dia").lower()
+    if agrupar not in ("dia", "semana", "mes"):
+        return jsonify({"msg": "agrupar debe ser dia, semana o mes"}), 400
+    try:
+        producto_id = int(request.args["producto_id"]) if request.args.get("producto_id") else None
+    except ValueError:
+        return jsonify({"msg": "producto_id inválido"}), 400
+
+    data = stock_diario.consumo(
+        desde=_parse_date(request.args.get("desde")),
+        hasta=_parse_date(request.args.get("hasta")),
+        producto_id=producto_id,
+        agrupar=agrupar,
+    )
     return jsonify(data), 200
 
 
+# ==========================
+# EXPORT (CSV / NDJSON en streaming)
+# ==========================
+_EXPORT_BATCH = 1000
+
+def _stream_export(query, nombre):
+    """
+    Respuesta en streaming de una consulta de columnas. Usa cursor de servidor
+    (stream_results + yield_per), así la memoria no crece con el nº de filas.
+    ?format=csv (por defecto) | ndjson
+    """
+    fmt = (request.args.get("format") or "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"msg": "format debe ser csv o ndjson"}), 400
+
+    cols = [c["name"] for c in query.column_descriptions]
+    rows = query.execution_options(stream_results=True).yield_per(_EXPORT_BATCH)
+
+    def _plain(v):
+        return iso(v) if isinstance(v, (datetime, date)) else v
+
+    def gen_csv():
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(cols)
+        for i, row in enumerate(rows, start=1):
+            w.writerow([_plain(v) for v in row])
+            if i % _EXPORT_BATCH == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue()
+
+    def gen_ndjson():
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps({k: _plain(v) for k, v in zip(cols, row)}, ensure_ascii=False))
+            if len(chunk) >= _EXPORT_BATCH:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    if fmt == "csv":
+        resp = Response(stream_with_context(gen_csv()), mimetype="text/csv")
+    else:
+        resp = Response(stream_with_context(gen_ndjson()), mimetype="application/x-ndjson")
+    resp.headers["Content-Disposition"] = f'attachment; filename="{nombre}.{fmt}"'
+    return resp
+
+
+@api.route("/salidas/export", methods=["GET"])
+@jwt_required()
+def salidas_export():
+    """Historial de salidas completo con los mismos filtros que /salidas."""
+    q = (
+        db.session.query(
+            Salida.id, Salida.fecha,
+            Salida.producto_id, Producto.nombre.label("producto_nombre"),
+            Salida.usuario_id, User.nombre.label("usuario_nombre"),
+            Salida.cantidad, Salida.observaciones,
+        )
+        .outerjoin(Producto, Producto.id == Salida.producto_id)
+        .outerjoin(User, User.id == Salida.usuario_id)
+        .filter(*_salidas_filtros())
+        .order_by(Salida.fecha.desc(), Salida.id.desc())
+    )
+    return _stream_export(q, "salidas")
+
+
+@api.route("/registro-entrada/export", methods=["GET"])
+@jwt_required()
+def entradas_export():
+    """Historial de entradas completo con los mismos filtros que GET /registro-entrada."""
+    q = (
+        db.session.query(
+            Entrada.id, Entrada.fecha,
+            Entrada.producto_id, Producto.nombre.label("producto_nombre"),
+            Entrada.proveedor_id, Proveedor.nombre.label("proveedor_nombre"),
+            Entrada.cantidad, Entrada.numero_albaran,
+            Entrada.precio_sin_iva, Entrada.porcentaje_iva,
+            Entrada.valor_iva, Entrada.precio_con_iva,
+        )
+        .outerjoin(Producto, Producto.id == Entrada.producto_id)
+        .outerjoin(Proveedor, Proveedor.id == Entrada.proveedor_id)
+        .filter(*_entradas_filtros())
+        .order_by(Entrada.fecha.desc(), Entrada.id.desc())
+    )
+    return _stream_export(q, "entradas")
+
+
 # ==========================
 # MAQUINARIA
 # ==========================
 @api.route("/maquinaria", methods=["GET"])
 @jwt_required()
 def maquinaria_list():
-    q = Maquinaria.query.order_by(Maquinaria.id.desc()).all()
-    return jsonify([m.to_dict() for m in q]), 200
+    return catalog_cache.conditional("maquinaria", lambda: _listado(
+        "maquinaria", Maquinaria.query, Maquinaria.to_dict, order=(Maquinaria.id.desc(),)
+    ))
 
 
 @api.route("/maquinaria", methods=["POST"])
@@ -624,6 +1142,16 @@ def maquinaria_delete(mid):
     return jsonify({"msg": "deleted"}), 200
 
 
+# ==========================
+# Caché de catálogos (métricas)
+# ==========================
+@api.route("/cache/stats", methods=["GET"])
+@role_required("administrador")
+def cache_stats():
+    """Aciertos/fallos de la caché de catálogos de ESTE worker."""
+    return jsonify({"pid": os.getpid(), **catalog_cache.cache.stats()}), 200
+
+
 # ==========================
 # Ping
 # ==========================
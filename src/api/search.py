@@ -0,0 +1,82 @@
+# src/api/search.py
+"""
+Búsqueda de productos por nombre/categoría (?q= de GET /productos).
+
+- Postgres: índices GIN pg_trgm sobre f_unaccent(lower(col)); el LIKE
+  '%q%' sobre esa misma expresión usa el índice y se ordena por similarity().
+- SQLite: tabla FTS5 'producto_fts' (tokenizer unicode61 sin diacríticos)
+  sincronizada con triggers; búsqueda por prefijo de palabra y orden bm25.
+- Otros motores, o si falta la migración: ILIKE como antes.
+
+Todas las variantes ignoran acentos y mayúsculas salvo el ILIKE de reserva.
+"""
+import re
+
+from sqlalchemy import Float, Integer, false, func, inspect, literal, text
+
+from .models import db, Producto
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_backend_cache = {}
+
+
+def _backend():
+    engine = db.engine
+    key = id(engine)
+    if key not in _backend_cache:
+        name = engine.dialect.name
+        if name == "postgresql":
+            with engine.connect() as conn:
+                ok = conn.execute(text(
+                    "SELECT 1 FROM pg_proc WHERE proname = 'f_unaccent'"
+                )).first() is not None
+            _backend_cache[key] = "trgm" if ok else "ilike"
+        elif name == "sqlite":
+            _backend_cache[key] = "fts5" if inspect(engine).has_table("producto_fts") else "ilike"
+        else:
+            _backend_cache[key] = "ilike"
+    return _backend_cache[key]
+
+
+def _norm_pg(expr):
+    return func.f_unaccent(func.lower(expr))
+
+
+def _fts_match(q):
+    """'lejia conc' -> '"lejia"* "conc"*' (AND de prefijos, sin sintaxis FTS del usuario)."""
+    return " ".join(f'"{w}"*' for w in _WORD.findall(q))
+
+
+def apply(query, q):
+    """Filtra y ordena por relevancia una query de Producto según 'q'."""
+    backend = _backend()
+
+    if backend == "trgm":
+        nq = _norm_pg(literal(q))
+        nombre = _norm_pg(Producto.nombre)
+        categoria = _norm_pg(func.coalesce(Producto.categoria, ""))
+        pattern = "%" + nq + "%"
+        return (
+            query.filter(nombre.like(pattern) | categoria.like(pattern))
+            .order_by(
+                func.greatest(func.similarity(nombre, nq), func.similarity(categoria, nq)).desc(),
+                Producto.nombre,
+            )
+        )
+
+    if backend == "fts5":
+        match = _fts_match(q)
+        if not match:
+            return query.filter(false())
+        fts = (
+            text("SELECT rowid AS id, rank FROM producto_fts WHERE producto_fts MATCH :m")
+            .bindparams(m=match)
+            .columns(id=Integer, rank=Float)
+            .subquery("fts")
+        )
+        return query.join(fts, fts.c.id == Producto.id).order_by(fts.c.rank, Producto.nombre)
+
+    like = f"%{q}%"
+    return query.filter(
+        (Producto.nombre.ilike(like)) | (Producto.categoria.ilike(like))
+    ).order_by(Producto.nombre)
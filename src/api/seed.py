@@ -0,0 +1,178 @@
+# src/api/seed.py
+"""
+Generador de datos sintéticos para pruebas de carga (flask seed-load).
+
+Todo se inserta con executemany de Core por bloques, sin objetos ORM.
+Es reproducible: con la misma semilla se obtienen los mismos datos.
+
+- Productos con nombres tipo "Detergente Profesional 5 L", categoría y
+  código (SW00000001...); la demanda sigue una ley de Zipf, así que unos
+  pocos productos concentran la mayoría de salidas, como en la tienda.
+- Salidas y entradas repartidas en orden cronológico a lo largo de
+  'anios' años, por lo que los ids crecen con la fecha.
+- stock_actual queda cuadrado con el libro (entradas - salidas); si a un
+  producto le faltan entradas se añade una de regularización al inicio.
+  Al final se reconstruye stock_diario.
+"""
+import itertools
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import bindparam, func, select, update
+from werkzeug.security import generate_password_hash
+
+from .models import db, User, Producto, Proveedor, Entrada, Salida
+from . import stock_diario, catalog_cache, suggest
+
+CHUNK = 20000
+PASSWORD = "seed1234"
+
+_TIPOS = [
+    "Detergente", "Suavizante", "Lejía", "Quitamanchas", "Desengrasante", "Ambientador",
+    "Champú", "Cera", "Abrillantador", "Limpiacristales", "Jabón", "Desinfectante",
+    "Bolsa", "Percha", "Funda", "Etiqueta", "Guante", "Bayeta", "Cepillo", "Esponja",
+    "Almidón", "Blanqueante", "Antical", "Neutralizador", "Perfume", "Microfibra",
+    "Pulimento", "Aceite", "Filtro", "Recambio",
+]
+_GAMAS = [
+    "Profesional", "Concentrado", "Eco", "Industrial", "Premium", "Básico", "Plus",
+    "Ultra", "Sensitive", "Max", "Classic", "Neutro", "Oxi", "Activo", "Hogar",
+    "Bio", "Express", "Delicado", "Intenso", "Suave",
+]
+_FORMATOS = ["1 L", "5 L", "10 L", "20 L", "500 ml", "750 ml", "1 kg", "5 kg", "pack 10", "pack 100"]
+_CATEGORIAS = ["Químicos", "Consumibles", "Embalaje", "Accesorios", "Recambios", "Textil"]
+
+
+def _nombres(n, rng):
+    combos = [" ".join(c) for c in itertools.product(_TIPOS, _GAMAS, _FORMATOS)]
+    rng.shuffle(combos)
+    return [combos[i] if i < len(combos) else f"{combos[i % len(combos)]} #{i}" for i in range(n)]
+
+
+def _insert(table, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(table.insert(), rows[i:i + CHUNK])
+
+
+def _fechas(n, desde, hasta, rng):
+    """n fechas crecientes repartidas entre desde y hasta."""
+    paso = (hasta - desde).total_seconds() / max(n, 1)
+    for i in range(n):
+        yield desde + timedelta(seconds=(i + rng.random()) * paso)
+
+
+def seed_load(productos=5000, proveedores=200, usuarios=50, salidas=2_000_000, entradas=None,
+              anios=3, semilla=42, log=print):
+    """
+    Genera el volumen pedido en una base sin productos. Devuelve un dict con
+    los totales insertados.
+    """
+    if db.session.execute(select(Producto.id).limit(1)).first():
+        raise ValueError("La base ya tiene productos: seed-load necesita un catálogo vacío")
+
+    rng = random.Random(semilla)
+    entradas = salidas // 10 if entradas is None else entradas
+    hasta = datetime.now().replace(microsecond=0)
+    desde = hasta - timedelta(days=365 * anios)
+
+    # --- usuarios y proveedores ---
+    # los ids se leen de vuelta: no tienen por qué ser consecutivos (huecos
+    # de secuencia en Postgres, filas borradas con AUTOINCREMENT...)
+    pw = generate_password_hash(PASSWORD)
+    emails = [f"seed{i}@seed.sw" for i in range(1, usuarios + 1)]
+    _insert(User.__table__, [
+        {"nombre": f"Empleado {i}", "email": email,
+         "rol": "encargado" if i % 10 == 0 else "empleado", "password_hash": pw, "activo": True}
+        for i, email in enumerate(emails, 1)
+    ])
+    uids = list(db.session.execute(
+        select(User.id).where(User.email.in_(emails)).order_by(User.id)
+    ).scalars())
+
+    base_prov = db.session.execute(select(func.coalesce(func.max(Proveedor.id), 0))).scalar()
+    nombres_prov = [f"Proveedor {i:03d}" for i in range(1, proveedores + 1)]
+    _insert(Proveedor.__table__, [
+        {"nombre": nombre, "telefono": f"9{rng.randrange(10**8):08d}",
+         "email": f"ventas{i}@proveedor.sw", "contacto": f"Contacto {i}"}
+        for i, nombre in enumerate(nombres_prov, 1)
+    ])
+    # el nombre de proveedor no es único: solo cuentan las filas de este insert
+    prov_ids = list(db.session.execute(
+        select(Proveedor.id)
+        .where(Proveedor.id > base_prov, Proveedor.nombre.in_(nombres_prov))
+        .order_by(Proveedor.id)
+    ).scalars())
+
+    # --- productos ---
+    nombres = _nombres(productos, rng)
+    _insert(Producto.__table__, [
+        {"nombre": nombres[i], "categoria": _CATEGORIAS[i % len(_CATEGORIAS)],
+         "codigo": f"SW{i + 1:08d}", "stock_minimo": rng.choice((0, 5, 10, 20, 50)), "stock_actual": 0}
+        for i in range(productos)
+    ])
+    pids = [pid for pid, in db.session.execute(select(Producto.id).order_by(Producto.id))]
+    log(f"{usuarios} usuarios, {proveedores} proveedores, {productos} productos")
+
+    # demanda Zipf: el i-ésimo producto (en orden aleatorio) pesa 1/(i+1)
+    orden = pids[:]
+    rng.shuffle(orden)
+    cum = list(itertools.accumulate(1 / (i + 1) for i in range(len(orden))))
+    saldo = dict.fromkeys(pids, 0)
+
+    # --- movimientos (cronológicos, por bloques) ---
+    def generar(total, hacer_fila, tabla, etiqueta):
+        fechas = _fechas(total, desde, hasta, rng)
+        hechos = 0
+        while hechos < total:
+            n = min(CHUNK, total - hechos)
+            prods = rng.choices(orden, cum_weights=cum, k=n)
+            filas = [hacer_fila(pid, next(fechas)) for pid in prods]
+            db.session.execute(tabla.insert(), filas)
+            hechos += n
+            if hechos % (CHUNK * 10) == 0 or hechos == total:
+                log(f"  {etiqueta}: {hechos}/{total}")
+
+    def salida(pid, fecha):
+        cantidad = rng.randint(1, 5)
+        saldo[pid] -= cantidad
+        return {"producto_id": pid, "usuario_id": rng.choice(uids), "cantidad": cantidad,
+                "fecha": fecha, "created_at": fecha}
+
+    def entrada(pid, fecha):
+        cantidad = rng.randint(10, 100)
+        saldo[pid] += cantidad
+        precio = round(rng.uniform(0.5, 80), 2)
+        return {"producto_id": pid, "proveedor_id": rng.choice(prov_ids), "cantidad": cantidad,
+                "numero_albaran": f"ALB-{fecha:%Y%m}-{rng.randrange(10**5):05d}",
+                "precio_sin_iva": precio, "porcentaje_iva": 21.0, "valor_iva": round(precio * 0.21, 2),
+                "precio_con_iva": round(precio * 1.21, 2), "fecha": fecha, "created_at": fecha}
+
+    generar(salidas, salida, Salida.__table__, "salidas")
+    generar(entradas, entrada, Entrada.__table__, "entradas")
+
+    # --- regularización y stock_actual cuadrado con el libro ---
+    regular = []
+    for pid, s in saldo.items():
+        if s < 0:
+            falta = -s + rng.randint(0, 50)
+            saldo[pid] += falta
+            regular.append({"producto_id": pid, "proveedor_id": None, "cantidad": falta,
+                            "numero_albaran": "REGULARIZACION", "fecha": desde, "created_at": desde})
+    _insert(Entrada.__table__, regular)
+
+    db.session.execute(
+        update(Producto.__table__)
+        .where(Producto.id == bindparam("b_id"))
+        .values(stock_actual=bindparam("b_stock")),
+        [{"b_id": pid, "b_stock": s} for pid, s in saldo.items()],
+    )
+    catalog_cache.touch("producto")
+    suggest.mark_stale()
+    db.session.commit()
+
+    n_diario = stock_diario.rebuild()
+    log(f"stock_diario: {n_diario} filas")
+    return {
+        "usuarios": usuarios, "proveedores": proveedores, "productos": productos,
+        "salidas": salidas, "entradas": entradas + len(regular), "stock_diario": n_diario,
+    }
@@ -0,0 +1,99 @@
+# src/api/snapshots.py
+"""
+Reconstrucción del stock de un producto en una fecha pasada.
+
+Se parte de la foto (StockSnapshot) más cercana a la fecha pedida -- antes o
+después -- y se aplican solo los movimientos entre ambas. El stock_actual del
+producto cuenta como una foto tomada "ahora", así que el coste queda acotado
+por el intervalo entre fotos y no por todo el histórico.
+
+Las fechas de la BD están en UTC (server_default ahora()); un 'at' sin zona
+se toma también como UTC, igual que los filtros desde/hasta de los listados.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from .models import db, Producto, Entrada, Salida, StockSnapshot, iso
+
+_T = StockSnapshot.__table__
+
+
+def take_snapshot():
+    """Foto de stock_actual de todo el catálogo en un solo INSERT ... SELECT."""
+    res = db.session.execute(
+        _T.insert().from_select(
+            ["producto_id", "stock"],
+            select(Producto.id, func.coalesce(Producto.stock_actual, 0)),
+        )
+    )
+    db.session.commit()
+    return res.rowcount
+
+
+def _neto(producto_id, desde, hasta):
+    """entradas - salidas del producto con desde < fecha <= hasta."""
+    def _sum(model):
+        q = select(func.coalesce(func.sum(model.cantidad), 0)).where(model.producto_id == producto_id)
+        if desde is not None:
+            q = q.where(model.fecha > desde)
+        if hasta is not None:
+            q = q.where(model.fecha <= hasta)
+        return db.session.execute(q).scalar()
+
+    return _sum(Entrada) - _sum(Salida)
+
+
+def _utc(dt):
+    """datetime con zona UTC; uno sin zona (SQLite, parámetros) ya está en UTC."""
+    if dt is None:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def stock_at(producto, at):
+    """
+    Stock de 'producto' en el instante 'at' (datetime), movimientos de 'at'
+    incluidos. Devuelve {"producto_id", "at", "stock", "desde_snapshot"}.
+    """
+    def _snap(*crit, orden):
+        return db.session.execute(
+            select(StockSnapshot.fecha, StockSnapshot.stock)
+            .where(StockSnapshot.producto_id == producto.id, *crit)
+            .order_by(orden)
+            .limit(1)
+        ).first()
+
+    ahora = datetime.now(timezone.utc)
+    at_u = _utc(at)
+
+    # (fecha, stock, hacia_atras); fecha None = stock_actual ("ahora")
+    candidatos = []
+    antes = _snap(StockSnapshot.fecha <= at_u, orden=StockSnapshot.fecha.desc())
+    if antes:
+        candidatos.append((antes.fecha, antes.stock, False))
+    despues = _snap(StockSnapshot.fecha > at_u, orden=StockSnapshot.fecha.asc())
+    if despues:
+        candidatos.append((despues.fecha, despues.stock, True))
+    elif at_u < ahora:
+        candidatos.append((None, int(producto.stock_actual or 0), True))
+
+    if not candidatos:
+        # 'at' en el futuro y sin fotos posteriores: vale el stock actual
+        fecha, stock = None, int(producto.stock_actual or 0)
+    else:
+        fecha, stock, hacia_atras = min(
+            candidatos, key=lambda c: abs(((_utc(c[0]) or ahora) - at_u).total_seconds())
+        )
+        if hacia_atras:
+            # deshacer los movimientos posteriores a 'at'
+            stock -= _neto(producto.id, at_u, fecha)
+        else:
+            stock += _neto(producto.id, fecha, at_u)
+
+    return {
+        "producto_id": producto.id,
+        "at": at.isoformat(),
+        "stock": stock,
+        "desde_snapshot": iso(fecha) or "stock_actual",
+    }
@@ -0,0 +1,124 @@
+# src/api/sql_stats.py
+"""
+Instrumentación SQL por petición.
+
+Los eventos before/after_cursor_execute del Engine cronometran cada
+sentencia (handle_error descarta el inicio de las que fallan) y la acumulan en flask.g: número de consultas, tiempo total de
+base de datos, las más lentas y cuántas veces se repite cada forma de
+sentencia (el SQL con parámetros, sin valores).
+
+Al terminar la petición:
+- fuera de producción se exponen en cabeceras (X-SQL-Count, X-SQL-Time-ms
+  y Server-Timing, que los devtools del navegador ya muestran);
+- si el tiempo de BD supera SQL_SLOW_MS se registra con las más lentas;
+- si una misma forma se repite más de SQL_REPEAT_MAX veces se avisa de un
+  posible N+1 (una consulta por fila en vez de un JOIN/IN).
+
+Las respuestas en streaming solo cuentan las consultas hechas antes de
+empezar a enviar el cuerpo.
+"""
+import heapq
+import os
+import time
+from collections import Counter
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+REPEAT_MAX = int(os.getenv("SQL_REPEAT_MAX", "10"))
+TOP_N = 3
+
+_START_KEY = "sql_stats_start"
+
+
+class RequestStats:
+    __slots__ = ("count", "total", "slowest", "shapes")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = []  # heap de (segundos, sql)
+        self.shapes = Counter()
+
+    def add(self, statement, elapsed):
+        self.count += 1
+        self.total += elapsed
+        self.shapes[statement] += 1
+        item = (elapsed, statement)
+        if len(self.slowest) < TOP_N:
+            heapq.heappush(self.slowest, item)
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, item)
+
+    def top(self):
+        return sorted(self.slowest, reverse=True)
+
+    def repeated(self):
+        return [(sql, n) for sql, n in self.shapes.most_common() if n > REPEAT_MAX]
+
+
+def current():
+    """Estadísticas de la petición en curso (None fuera de una petición)."""
+    return g.get("sql_stats") if has_request_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, _cursor, _statement, _params, _context, _executemany):
+    conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, _cursor, statement, _params, _context, _executemany):
+    starts = conn.info.get(_START_KEY)
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = current()
+    if stats is not None:
+        stats.add(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _error(ctx):
+    # una sentencia que falla no llega a after_cursor_execute: sin esto su
+    # inicio se quedaría para siempre en la pila de la conexión del pool
+    if ctx.connection is None or ctx.execution_context is None:
+        return
+    starts = ctx.connection.info.get(_START_KEY)
+    if starts:
+        starts.pop()
+
+
+def _short(sql, n=200):
+    sql = " ".join(sql.split())
+    return sql if len(sql) <= n else sql[:n] + "…"
+
+
+def init_app(app, expose_headers=False):
+    @app.before_request
+    def _sql_stats_start():
+        g.sql_stats = RequestStats()
+
+    @app.after_request
+    def _sql_stats_report(resp):
+        stats = g.get("sql_stats")
+        if stats is None:
+            return resp
+        total_ms = stats.total * 1000
+
+        if expose_headers:
+            resp.headers["X-SQL-Count"] = str(stats.count)
+            resp.headers["X-SQL-Time-ms"] = f"{total_ms:.1f}"
+            resp.headers.add("Server-Timing", f'db;dur={total_ms:.1f};desc="{stats.count} SQL"')
+
+        ruta = f"{request.method} {request.path}"
+        if total_ms > SLOW_MS:
+            app.logger.warning(
+                "SQL lento %s: %d consultas, %.1f ms; más lentas: %s", ruta, stats.count, total_ms,
+                "; ".join(f"{s * 1000:.1f} ms {_short(sql)}" for s, sql in stats.top()),
+            )
+        for sql, n in stats.repeated():
+            app.logger.warning("Posible N+1 en %s: %d ejecuciones de %s", ruta, n, _short(sql))
+        return resp
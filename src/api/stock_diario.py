@@ -0,0 +1,128 @@
+# src/api/stock_diario.py
+"""
+Agregado diario de movimientos (tabla stock_diario).
+
+Cada registro de entrada/salida suma su cantidad a la fila (producto, día)
+con un upsert dentro de la misma transacción, así las consultas de consumo
+leen O(días) filas en lugar de recorrer todo el histórico.
+"""
+from collections import OrderedDict
+
+from sqlalchemy import Date, func, select, union_all, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+from .models import db, Entrada, Salida, StockDiario
+
+_T = StockDiario.__table__
+
+
+def _insert():
+    name = db.engine.dialect.name
+    if name == "postgresql":
+        return postgresql.insert(_T)
+    if name == "sqlite":
+        return sqlite.insert(_T)
+    return None
+
+
+def acumular(deltas):
+    """
+    Suma a stock_diario del día actual (CURRENT_DATE de la BD, el mismo día
+    que tomará el server_default de 'fecha').
+    deltas: {producto_id: (entradas, salidas)}. No hace commit.
+    """
+    if not deltas:
+        return
+    rows = [
+        {"producto_id": pid, "dia": func.current_date(), "entradas": e, "salidas": s}
+        for pid, (e, s) in sorted(deltas.items())
+    ]
+    ins = _insert()
+    if ins is not None:
+        stmt = ins.values(rows)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[_T.c.producto_id, _T.c.dia],
+            set_={
+                "entradas": _T.c.entradas + stmt.excluded.entradas,
+                "salidas": _T.c.salidas + stmt.excluded.salidas,
+            },
+        ))
+        return
+
+    # Otros motores: UPDATE y, si no había fila, INSERT.
+    for r in rows:
+        res = db.session.execute(
+            _T.update()
+            .where(_T.c.producto_id == r["producto_id"], _T.c.dia == func.current_date())
+            .values(entradas=_T.c.entradas + r["entradas"], salidas=_T.c.salidas + r["salidas"])
+        )
+        if res.rowcount == 0:
+            db.session.execute(_T.insert().values(**r))
+
+
+def acumular_entrada(producto_id, cantidad):
+    acumular({producto_id: (cantidad, 0)})
+
+
+def acumular_salida(producto_id, cantidad):
+    acumular({producto_id: (0, cantidad)})
+
+
+def _movimientos_por_dia():
+    """SELECT agrupado (producto, día) sobre todo el histórico."""
+    movs = union_all(
+        select(Entrada.producto_id, Entrada.fecha.label("fecha"),
+               Entrada.cantidad.label("e"), literal(0).label("s")),
+        select(Salida.producto_id, Salida.fecha.label("fecha"),
+               literal(0).label("e"), Salida.cantidad.label("s")),
+    ).subquery()
+    dia = func.date(movs.c.fecha, type_=Date)
+    return (
+        select(movs.c.producto_id, dia, func.sum(movs.c.e), func.sum(movs.c.s))
+        .group_by(movs.c.producto_id, dia)
+    )
+
+
+def rebuild():
+    """Reconstruye stock_diario desde entrada/salida. Devuelve nº de filas."""
+    db.session.execute(_T.delete())
+    db.session.execute(
+        _T.insert().from_select(["producto_id", "dia", "entradas", "salidas"], _movimientos_por_dia())
+    )
+    n = db.session.execute(select(func.count()).select_from(_T)).scalar()
+    db.session.commit()
+    return n
+
+
+def _periodo(dia, agrupar):
+    if agrupar == "semana":
+        y, w, _ = dia.isocalendar()
+        return f"{y}-W{w:02d}"
+    if agrupar == "mes":
+        return f"{dia.year}-{dia.month:02d}"
+    return dia.isoformat()
+
+
+def consumo(desde=None, hasta=None, producto_id=None, agrupar="dia"):
+    """
+    Totales de entradas/salidas por periodo (dia|semana|mes) y producto,
+    leídos del agregado.
+    """
+    q = select(_T.c.producto_id, _T.c.dia, _T.c.entradas, _T.c.salidas)
+    if producto_id:
+        q = q.where(_T.c.producto_id == producto_id)
+    if desde:
+        q = q.where(_T.c.dia >= desde)
+    if hasta:
+        q = q.where(_T.c.dia <= hasta)
+    q = q.order_by(_T.c.dia, _T.c.producto_id)
+
+    tot = OrderedDict()
+    for pid, dia, e, s in db.session.execute(q):
+        acc = tot.setdefault((_periodo(dia, agrupar), pid), [0, 0])
+        acc[0] += e
+        acc[1] += s
+    return [
+        {"periodo": periodo, "producto_id": pid, "entradas": e, "salidas": s}
+        for (periodo, pid), (e, s) in tot.items()
+    ]
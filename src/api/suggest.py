@@ -0,0 +1,270 @@
+# src/api/suggest.py
+"""
+Índice en memoria para autocompletar productos (GET /productos/suggest).
+
+Tres índices de prefijo, uno por tipo de coincidencia y en orden de
+preferencia: nombre completo, cada palabra del nombre y categoría. Cada uno
+es una lista ordenada de términos normalizados (sin acentos, minúsculas),
+recorrida con bisect, y para cada término la lista de productos ordenada
+por nombre. Una consulta mezcla (heapq.merge) las listas de los términos
+con el prefijo y se detiene al llenar k, así que devuelve el top-k exacto
+(tipo de coincidencia, nombre) sin recorrer todas las coincidencias. Cada
+producto guarda su stock_actual: una sugerencia no toca la base de datos.
+
+Se construye la primera vez que se usa y se mantiene con los commits de este
+proceso: los cambios ORM de Producto llegan por eventos de mapper y los
+UPDATE Core de stock avisan con note_stock()/mark_stale(). Los commits de
+otros workers se recogen fuera de la petición: cada MAX_AGE segundos un hilo
+de fondo lee la versión del catálogo 'producto' (api/catalog_cache.py) y
+solo reconstruye si ha cambiado; mientras tanto se sirve el índice vigente.
+"""
+import bisect
+import heapq
+import os
+import threading
+import time
+import unicodedata
+
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from .models import db, Producto
+from . import catalog_cache
+
+MAX_AGE = int(os.getenv("SUGGEST_MAX_AGE", "10"))
+
+_INFO_KEY = "suggest_pendiente"
+
+# tipos de coincidencia, en orden de preferencia
+_R_NOMBRE, _R_PALABRA, _R_CATEGORIA = 0, 1, 2
+_RANGOS = (_R_NOMBRE, _R_PALABRA, _R_CATEGORIA)
+
+
+def normalize(s):
+    s = unicodedata.normalize("NFKD", (s or "").lower())
+    return "".join(c for c in s if not unicodedata.combining(c)).strip()
+
+
+def _terms(nombre, categoria):
+    """(rango, término) de un producto."""
+    n = normalize(nombre)
+    out = {(_R_NOMBRE, n)} if n else set()
+    for w in n.split()[1:]:
+        out.add((_R_PALABRA, w))
+    c = normalize(categoria)
+    if c:
+        out.add((_R_CATEGORIA, c))
+    return out
+
+
+class _Terminos:
+    """Términos ordenados de un rango y, por término, [(nombre normalizado, id)] ordenada."""
+
+    def __init__(self):
+        self.terms = []
+        self.posting = {}
+
+    def add(self, term, entry):
+        lst = self.posting.get(term)
+        if lst is None:
+            bisect.insort(self.terms, term)
+            self.posting[term] = [entry]
+        else:
+            bisect.insort(lst, entry)
+
+    def remove(self, term, entry):
+        lst = self.posting.get(term)
+        if not lst:
+            return
+        i = bisect.bisect_left(lst, entry)
+        if i < len(lst) and lst[i] == entry:
+            del lst[i]
+        if not lst:
+            del self.posting[term]
+            del self.terms[bisect.bisect_left(self.terms, term)]
+
+    def matching(self, p):
+        """Listas de los términos que empiezan por p."""
+        i = bisect.bisect_left(self.terms, p)
+        while i < len(self.terms) and self.terms[i].startswith(p):
+            yield self.posting[self.terms[i]]
+            i += 1
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rangos = {r: _Terminos() for r in _RANGOS}
+        self._items = {}        # id -> {"id", "nombre", "categoria", "stock_actual"}
+        self._built = False
+        self._stale = False
+        self._version = None    # versión del catálogo con la que se construyó
+        self._checked_at = 0.0
+        self._refreshing = False
+
+    # --- construcción ---
+    def _load(self):
+        # la versión se lee antes que las filas: si un commit se cuela en
+        # medio, la siguiente comprobación verá una versión distinta
+        self._stale = False
+        version = catalog_cache.version("producto")
+        rows = db.session.execute(
+            select(Producto.id, Producto.nombre, Producto.categoria, Producto.stock_actual)
+        ).all()
+        rangos = {r: _Terminos() for r in _RANGOS}
+        items = {}
+        for pid, nombre, categoria, stock in rows:
+            items[pid] = {"id": pid, "nombre": nombre, "categoria": categoria, "stock_actual": stock}
+            for rango, term in _terms(nombre, categoria):
+                rangos[rango].posting.setdefault(term, []).append((normalize(nombre), pid))
+        for t in rangos.values():
+            t.terms = sorted(t.posting)
+            for lst in t.posting.values():
+                lst.sort()
+        with self._lock:
+            self._rangos = rangos
+            self._items = items
+            self._built = True
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def _refresh(self, app):
+        try:
+            with app.app_context():
+                try:
+                    if self._stale or catalog_cache.version("producto") != self._version:
+                        self._load()
+                    else:
+                        self._checked_at = time.monotonic()
+                finally:
+                    db.session.remove()
+        except Exception:
+            app.logger.exception("No se pudo refrescar el índice de sugerencias")
+        finally:
+            self._refreshing = False
+
+    def _ensure(self):
+        if not self._built:
+            self._load()  # primer uso: no hay nada que servir todavía
+            return
+        if not (self._stale or time.monotonic() - self._checked_at > MAX_AGE):
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        app = current_app._get_current_object()
+        threading.Thread(target=self._refresh, args=(app,), name="suggest-refresh", daemon=True).start()
+
+    def mark_stale(self):
+        self._stale = True
+
+    def reset(self):
+        """Descarta el índice: el próximo uso lo construye de nuevo (tests)."""
+        with self._lock:
+            self._rangos = {r: _Terminos() for r in _RANGOS}
+            self._items = {}
+            self._built = False
+            self._stale = False
+
+    # --- mantenimiento incremental (tras commit) ---
+    def _remove(self, pid):
+        old = self._items.get(pid)
+        if not old:
+            return
+        entry = (normalize(old["nombre"]), pid)
+        for rango, term in _terms(old["nombre"], old["categoria"]):
+            self._rangos[rango].remove(term, entry)
+
+    def upsert(self, pid, nombre, categoria, stock):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(pid)
+            self._items[pid] = {"id": pid, "nombre": nombre, "categoria": categoria, "stock_actual": stock}
+            entry = (normalize(nombre), pid)
+            for rango, term in _terms(nombre, categoria):
+                self._rangos[rango].add(term, entry)
+
+    def delete(self, pid):
+        with self._lock:
+            if not self._built:
+                return
+            self._remove(pid)
+            self._items.pop(pid, None)
+
+    def set_stock(self, pid, stock):
+        with self._lock:
+            item = self._items.get(pid)
+            if item is not None:
+                item["stock_actual"] = stock
+
+    # --- consulta ---
+    def suggest(self, prefix, k=10):
+        self._ensure()
+        p = normalize(prefix)
+        if not p:
+            return []
+        out, vistos = [], set()
+        with self._lock:
+            for rango in _RANGOS:
+                for _nombre, pid in heapq.merge(*self._rangos[rango].matching(p)):
+                    if pid in vistos:
+                        continue
+                    vistos.add(pid)
+                    out.append(dict(self._items[pid]))
+                    if len(out) == k:
+                        return out
+        return out
+
+
+index = PrefixIndex()
+
+
+# --- sincronización con commits ---
+def _pending(session):
+    return session.info.setdefault(_INFO_KEY, [])
+
+
+def note_stock(pid, stock):
+    """Llamar tras un UPDATE Core de stock de un producto."""
+    _pending(db.session).append(("stock", pid, stock))
+
+
+def mark_stale():
+    """Llamar tras un UPDATE Core masivo: el próximo uso reconstruye el índice en segundo plano."""
+    _pending(db.session).append(("stale",))
+
+
+@event.listens_for(Producto, "after_insert")
+@event.listens_for(Producto, "after_update")
+def _producto_saved(_mapper, _conn, target):
+    s = object_session(target)
+    if s is not None:
+        _pending(s).append(("upsert", target.id, target.nombre, target.categoria, target.stock_actual))
+
+
+@event.listens_for(Producto, "after_delete")
+def _producto_deleted(_mapper, _conn, target):
+    s = object_session(target)
+    if s is not None:
+        _pending(s).append(("delete", target.id))
+
+
+@event.listens_for(db.session, "after_commit")
+def _apply_pending(session):
+    for op in session.info.pop(_INFO_KEY, ()):
+        if op[0] == "upsert":
+            index.upsert(*op[1:])
+        elif op[0] == "delete":
+            index.delete(op[1])
+        elif op[0] == "stock":
+            index.set_stock(op[1], op[2])
+        else:
+            index.mark_stale()
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def _drop_pending(session, _previous_transaction):
+    session.info.pop(_INFO_KEY, None)
@@ -2,6 +2,7 @@
 import os
 import re
 from urllib.parse import urlparse
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
 from flask import Flask, jsonify, send_from_directory, request
 from flask_cors import CORS
@@ -13,12 +14,15 @@ from api.utils import APIException, generate_sitemap
 from api.routes import api
 from api.admin import setup_admin
 from api.models import db  # importa db SOLO una vez
+from api.json_provider import OrjsonProvider
+from api import compression, sql_stats, metrics, access_log, profiler
 
 # ===== Cargar .env (local) =====
 load_dotenv()
 
 # ===== Crear la app =====
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # orjson: fechas ISO nativas
 
 # ===== Entorno / flags =====
 ENV = os.getenv("ENV", "development").lower().strip()
@@ -66,7 +70,7 @@ def _force_cors_headers(resp):
     is_local = origin.startswith("http://localhost") or origin.startswith("http://127.0.0.1")
     if origin and (is_codespaces or is_local or origin in origins_env):
         resp.headers["Access-Control-Allow-Origin"] = origin
-        resp.headers["Vary"] = "Origin"
+        resp.vary.add("Origin")
         resp.headers["Access-Control-Allow-Credentials"] = "true"
         resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
         resp.headers["Access-Control-Allow-Methods"] = "GET,POST,PUT,PATCH,DELETE,OPTIONS"
@@ -94,6 +98,20 @@ migrate = Migrate(app, db, compare_type=True)
 jwt = JWTManager(app)
 swagger = Swagger(app)
 
+# ===== Access log JSON (cola + hilo de fondo, muestreado) =====
+# Antes que la compresión: los after_request corren en orden inverso, así
+# que el log ve la respuesta ya comprimida (bytes = lo que sale por la red).
+access_log.init_app(app)
+
+# ===== Compresión gzip/brotli (Accept-Encoding, api/compression.py) =====
+compression.init_app(app)
+
+# ===== Instrumentación SQL por petición (cabeceras solo fuera de prod) =====
+sql_stats.init_app(app, expose_headers=not IS_PROD)
+
+# ===== Métricas Prometheus (GET /metrics, agregadas entre workers) =====
+metrics.init_app(app, db)
+
 # ===== Blueprints =====
 app.register_blueprint(api, url_prefix='/api')
 setup_admin(app)
@@ -135,10 +153,8 @@ def serve_any_other_file(path):
 def home():
     return "API funcionando correctamente"
 
-# ===== Log simple de requests =====
-@app.before_request
-def _req_log():
-    print(f"REQ {request.method} {request.path} Origin: {request.headers.get('Origin')}", flush=True)
+# ===== Perfilado: ?__profile=1 (admin) y 1% más lento a PROFILE_DIR =====
+profiler.init_app(app)
 
 # ===== Endpoint de diagnóstico =====
 @app.get("/debug/info")
@@ -159,7 +175,8 @@ def debug_info():
 from api.commands import setup_commands
 setup_commands(app)
 
-print(">>> Using DB:", app.config["SQLALCHEMY_DATABASE_URI"], flush=True)
+# sin credenciales: make_url().__repr__ enmascara la contraseña
+print(">>> Using DB:", repr(make_url(app.config["SQLALCHEMY_DATABASE_URI"])), flush=True)
 
 # ===== Entry point local =====
 if __name__ == "__main__":
@@ -0,0 +1,113 @@
+"""
+Fixtures comunes: la app real sobre un SQLite en fichero temporal, con el
+esquema recreado en cada test (db.create_all) y tokens JWT por rol.
+
+En fichero y no en memoria: en memoria todas las sesiones comparten una
+única conexión y los tests de concurrencia necesitan una por hilo. La URL
+se fija antes de importar la app porque Flask-SQLAlchemy 3 crea el engine
+en init_app (la 2.x lo recreaba al cambiar la URI).
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# La URL se lee al importar src/app.py: tiene que estar antes del import.
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="sw-tests-"), "tests.db")
+os.environ.setdefault("ACCESS_LOG_SAMPLE", "0")
+os.environ.pop("METRICS_TOKEN", None)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from app import app as flask_app  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from api.models import db, User, Producto, Proveedor, Entrada  # noqa: E402
+from api import catalog_cache, search, suggest  # noqa: E402
+
+
+def _reset_caches():
+    # cachés de proceso que sobreviven entre tests (los ids se reutilizan)
+    for tabla in catalog_cache.CATALOGOS:
+        catalog_cache.cache.invalidate(tabla)
+    search._backend_cache.clear()
+    suggest.index.reset()
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+        _reset_caches()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _headers(user):
+    token = create_access_token(identity=str(user.id), additional_claims={"rol": user.rol})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def usuarios(app):
+    admin = User(nombre="Admin", email="admin@test.sw", rol="administrador", password_hash="x")
+    empleado = User(nombre="Empleado", email="empleado@test.sw", rol="empleado", password_hash="x")
+    db.session.add_all([admin, empleado])
+    db.session.commit()
+    return {"admin": admin, "empleado": empleado}
+
+
+@pytest.fixture
+def admin_headers(usuarios):
+    return _headers(usuarios["admin"])
+
+
+@pytest.fixture
+def empleado_headers(usuarios):
+    return _headers(usuarios["empleado"])
+
+
+@pytest.fixture
+def catalogo(app):
+    """Tres productos con stock 100 (su entrada inicial en el libro) y dos proveedores."""
+    productos = [
+        Producto(nombre=f"Producto {i}", categoria="Químicos" if i % 2 else "Textil",
+                 stock_actual=100, stock_minimo=5)
+        for i in range(1, 4)
+    ]
+    proveedores = [Proveedor(nombre=f"Proveedor {i}") for i in range(1, 3)]
+    db.session.add_all(productos + proveedores)
+    db.session.flush()
+    db.session.add_all([Entrada(producto_id=p.id, cantidad=100, numero_albaran="STOCK INICIAL") for p in productos])
+    db.session.commit()
+    return {"productos": productos, "proveedores": proveedores}
+
+
+@contextmanager
+def _sentencias():
+    capturadas = []
+
+    def _capturar(_conn, _cursor, statement, parameters, _context, _many):
+        capturadas.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _capturar)
+    try:
+        yield capturadas
+    finally:
+        event.remove(engine, "before_cursor_execute", _capturar)
+
+
+@pytest.fixture
+def sentencias(app):
+    """with sentencias() as sql: ... -> lista de (sql, params) ejecutadas en el bloque."""
+    return _sentencias
@@ -0,0 +1,17 @@
+"""Access log: 'bytes' es el tamaño que sale por la red, ya comprimido."""
+from api import access_log, compression
+
+
+def test_bytes_es_el_cuerpo_comprimido(client, catalogo, admin_headers, monkeypatch):
+    entradas = []
+    monkeypatch.setattr(access_log, "SAMPLE", 1.0)
+    monkeypatch.setattr(access_log.logger, "info", entradas.append)
+    monkeypatch.setattr(compression, "MIN_SIZE", 0)
+
+    resp = client.get("/api/productos", headers={**admin_headers, "Accept-Encoding": "gzip"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+
+    entry, = entradas
+    assert entry["path"] == "/api/productos"
+    assert entry["bytes"] == len(resp.get_data()) == int(resp.headers["Content-Length"])
@@ -0,0 +1,24 @@
+"""ETag / 304 de los catálogos (api/catalog_cache.py)."""
+
+
+def test_304_si_no_cambia_y_200_tras_modificar(client, catalogo, admin_headers):
+    primera = client.get("/api/productos", headers=admin_headers)
+    assert primera.status_code == 200
+    etag = primera.headers["ETag"]
+
+    revalida = client.get("/api/productos", headers={**admin_headers, "If-None-Match": etag})
+    assert revalida.status_code == 304
+
+    p1 = catalogo["productos"][0]
+    assert client.post("/api/registro-salida", json={"producto_id": p1.id, "cantidad": 1},
+                       headers=admin_headers).status_code == 201
+    tras_salida = client.get("/api/productos", headers={**admin_headers, "If-None-Match": etag})
+    assert tras_salida.status_code == 200
+    assert tras_salida.headers["ETag"] != etag
+
+
+def test_errores_sin_etag(client, catalogo, admin_headers):
+    resp = client.get("/api/productos?fields=bogus", headers=admin_headers)
+    assert resp.status_code == 400
+    assert "ETag" not in resp.headers
+    assert "X-Cache" not in resp.headers
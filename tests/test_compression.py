@@ -0,0 +1,97 @@
+"""Compresión gzip/brotli según Accept-Encoding (api/compression.py)."""
+import gzip
+import zlib
+
+import pytest
+from flask import Response
+
+from api import compression
+from api.models import db, Salida
+
+
+@pytest.fixture
+def sin_minimo(monkeypatch):
+    monkeypatch.setattr(compression, "MIN_SIZE", 0)
+
+
+def _get(client, url, headers, encoding=None):
+    h = dict(headers)
+    if encoding:
+        h["Accept-Encoding"] = encoding
+    return client.get(url, headers=h)
+
+
+def test_gzip(client, catalogo, admin_headers, sin_minimo):
+    plano = _get(client, "/api/productos", admin_headers)
+    resp = _get(client, "/api/productos", admin_headers, "gzip")
+
+    assert "Content-Encoding" not in plano.headers
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.vary
+    assert int(resp.headers["Content-Length"]) == len(resp.data)
+    assert gzip.decompress(resp.data) == plano.data
+
+
+def test_brotli_preferido_a_gzip(client, catalogo, admin_headers, sin_minimo):
+    brotli = pytest.importorskip("brotli")
+    plano = _get(client, "/api/productos", admin_headers)
+    resp = _get(client, "/api/productos", admin_headers, "gzip, deflate, br")
+
+    assert resp.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(resp.data) == plano.data
+
+
+def test_etag_pasa_a_debil(client, catalogo, admin_headers, sin_minimo):
+    plano = _get(client, "/api/productos", admin_headers)
+    resp = _get(client, "/api/productos", admin_headers, "gzip")
+    etag, weak = plano.get_etag()
+    assert etag and not weak
+    assert resp.get_etag() == (etag, True)
+
+
+def test_respuesta_pequena_sin_comprimir(client):
+    resp = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert len(resp.data) < compression.MIN_SIZE
+    assert "Content-Encoding" not in resp.headers
+    assert "Accept-Encoding" in resp.vary  # otra respuesta de la misma URL sí podría ir comprimida
+
+
+def test_sin_accept_encoding_sin_comprimir(client, catalogo, admin_headers, sin_minimo):
+    resp = client.get("/api/productos", headers={**admin_headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in resp.headers
+    assert "Accept-Encoding" in resp.vary
+
+
+@pytest.mark.parametrize("resp", [
+    Response(b"x" * 5000, mimetype="text/plain", headers={"Content-Encoding": "br"}),
+    Response(b"x" * 5000, mimetype="image/png"),
+], ids=["ya-codificada", "no-texto"])
+def test_no_se_recomprime(app, resp):
+    with app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+        out = compression._comprimir(resp)
+    assert out.get_data() == b"x" * 5000
+    assert out.headers.get("Content-Encoding") in (None, "br")
+
+
+def test_export_en_streaming(client, catalogo, usuarios, admin_headers):
+    p = catalogo["productos"][0]
+    db.session.add_all([Salida(producto_id=p.id, usuario_id=usuarios["admin"].id, cantidad=1) for _ in range(2500)])
+    db.session.commit()
+
+    plano = _get(client, "/api/salidas/export", admin_headers).get_data()
+    resp = client.get("/api/salidas/export", headers={**admin_headers, "Accept-Encoding": "gzip"}, buffered=False)
+    assert resp.is_streamed
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+
+    # cada trozo se puede descomprimir en cuanto llega (flush por trozo)
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    trozos = []
+    for chunk in resp.response:
+        trozos.append(d.decompress(chunk))
+        if len(trozos) == 1:
+            assert trozos[0].startswith(plano.split(b"\n", 1)[0])
+    resp.close()
+    assert len(trozos) > 2
+    assert b"".join(trozos) + d.flush() == plano
+    assert d.eof
@@ -0,0 +1,96 @@
+"""
+Escrituras de stock concurrentes sobre el SQLite en fichero de los tests
+(cada hilo con su conexión): el stock nunca queda negativo y stock_actual
+cuadra con el libro de entradas y salidas.
+"""
+import threading
+
+from api import reconcile
+from api.models import db, Producto, Salida
+
+
+def _en_paralelo(app, peticiones, hilos=8):
+    """Reparte las peticiones (path, body, headers) entre hilos; devuelve sus status."""
+    resultados = []
+    mutex = threading.Lock()
+    barrera = threading.Barrier(hilos)
+
+    def trabajar(mias):
+        client = app.test_client()
+        barrera.wait()
+        for path, body, headers in mias:
+            status = client.post(path, json=body, headers=headers).status_code
+            with mutex:
+                resultados.append((path, body, status))
+
+    ts = [threading.Thread(target=trabajar, args=(peticiones[i::hilos],)) for i in range(hilos)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return resultados
+
+
+def _cuadra():
+    db.session.expire_all()
+    assert reconcile.drift() == []
+    assert Producto.query.filter(Producto.stock_actual < 0).count() == 0
+
+
+def test_lotes_y_salidas_concurrentes(app, catalogo, admin_headers, empleado_headers):
+    p1, p2, _ = catalogo["productos"]
+    peticiones = []
+    for i in range(120):
+        if i % 3 == 0:
+            lineas = [{"producto_id": p1.id, "cantidad": 2}, {"producto_id": p2.id, "cantidad": 1}]
+            peticiones.append(("/api/registro-salida/lote", {"lineas": lineas}, admin_headers))
+        else:
+            pid = p1.id if i % 2 else p2.id
+            peticiones.append(("/api/registro-salida", {"producto_id": pid, "cantidad": 1}, empleado_headers))
+
+    resultados = _en_paralelo(app, peticiones)
+
+    assert {s for _, _, s in resultados} <= {201, 400}
+    lineas_ok = sum(len(b["lineas"]) if "lineas" in b else 1 for _, b, s in resultados if s == 201)
+    assert Salida.query.count() == lineas_ok
+    _cuadra()
+
+
+def test_salidas_concurrentes_nunca_dejan_stock_negativo(app, catalogo, empleado_headers):
+    p1 = catalogo["productos"][0]
+    # 160 peticiones que piden 240 unidades sobre un stock de 100
+    peticiones = [
+        ("/api/registro-salida", {"producto_id": p1.id, "cantidad": 1 + i % 2}, empleado_headers)
+        for i in range(160)
+    ]
+
+    resultados = _en_paralelo(app, peticiones)
+
+    assert {s for _, _, s in resultados} <= {201, 400}
+    servidas = sum(b["cantidad"] for _, b, s in resultados if s == 201)
+    db.session.expire_all()
+    stock = db.session.get(Producto, p1.id).stock_actual
+    assert stock == 100 - servidas
+    assert 0 <= stock <= 1  # solo se rechaza lo que ya no cabe
+    assert Salida.query.count() == sum(s == 201 for _, _, s in resultados)
+    _cuadra()
+
+
+def test_entradas_y_salidas_concurrentes_no_pierden_unidades(app, catalogo, admin_headers, empleado_headers):
+    p1 = catalogo["productos"][0]
+    peticiones = []
+    for i in range(160):
+        if i % 2:
+            peticiones.append(("/api/registro-entrada", {"producto_id": p1.id, "cantidad": 3}, admin_headers))
+        else:
+            peticiones.append(("/api/registro-salida", {"producto_id": p1.id, "cantidad": 2}, empleado_headers))
+
+    resultados = _en_paralelo(app, peticiones)
+
+    assert {s for _, _, s in resultados} <= {201, 400}
+    entradas = sum(b["cantidad"] for p, b, s in resultados if s == 201 and p.endswith("entrada"))
+    salidas = sum(b["cantidad"] for p, b, s in resultados if s == 201 and p.endswith("salida"))
+    assert entradas == 80 * 3
+    db.session.expire_all()
+    assert db.session.get(Producto, p1.id).stock_actual == 100 + entradas - salidas
+    _cuadra()
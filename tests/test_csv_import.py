@@ -0,0 +1,37 @@
+"""Importación CSV de entradas: bloques de INSERT y el stock aplicado una vez al final."""
+import io
+
+from api.csv_import import import_entradas
+from api.models import db, Entrada, Producto
+
+
+def _csv(lineas):
+    return io.StringIO("producto_id,cantidad,proveedor_id\n" + "".join(f"{l}\n" for l in lineas))
+
+
+def test_delta_de_stock_en_un_update_final_en_orden_de_id(app, catalogo, sentencias):
+    p1, p2, p3 = catalogo["productos"]
+    lineas = [f"{p3.id},1,", f"{p1.id},2,1", f"{p2.id},3,", f"{p1.id},4,2", f"{p3.id},5,"]
+
+    with sentencias() as sql:
+        res = import_entradas(_csv(lineas), chunk_size=2)
+
+    assert res == {"ok": True, "lineas": 5, "importadas": 5, "errores": []}
+    assert sum(s.startswith("INSERT INTO entrada") for s, _ in sql) == 3
+    assert sum(s.startswith("UPDATE producto") for s, _ in sql) == 1
+    bloqueo = next(params for s, params in sql if s.startswith("SELECT producto.id") and " IN (" in s)
+    assert list(bloqueo) == [p1.id, p2.id, p3.id]
+
+    db.session.expire_all()
+    assert [p.stock_actual for p in Producto.query.order_by(Producto.id)] == [106, 103, 106]
+
+
+def test_linea_invalida_no_aplica_nada(app, catalogo):
+    p1 = catalogo["productos"][0]
+    res = import_entradas(_csv([f"{p1.id},2,", "999,1,", f"{p1.id},x,"]), chunk_size=1)
+
+    assert not res["ok"]
+    assert [e["msg"] for e in res["errores"]] == ["Producto 999 no existe", "Valores numéricos inválidos"]
+    db.session.expire_all()
+    assert db.session.get(Producto, p1.id).stock_actual == 100
+    assert Entrada.query.count() == 3  # solo las iniciales del catálogo
@@ -0,0 +1,46 @@
+"""
+Los historiales de entradas y salidas cargan sus relaciones en un número
+fijo de consultas: no puede crecer con el número de filas (N+1).
+"""
+import pytest
+
+from api.models import db, Entrada, Salida
+
+ENDPOINTS = [
+    "/api/registro-entrada",
+    "/api/registro-entrada?limit=50",
+    "/api/registro-salida",
+    "/api/registro-salida?limit=50",
+    "/api/salidas",
+    "/api/salidas?limit=50",
+    "/api/salidas?fields=fecha,producto_nombre,usuario_nombre,cantidad",
+]
+
+
+def _movimientos(n, catalogo, usuarios):
+    productos = catalogo["productos"]
+    proveedores = catalogo["proveedores"]
+    users = list(usuarios.values())
+    for i in range(n):
+        db.session.add(Entrada(producto_id=productos[i % len(productos)].id,
+                               proveedor_id=proveedores[i % len(proveedores)].id, cantidad=1))
+        db.session.add(Salida(producto_id=productos[i % len(productos)].id,
+                              usuario_id=users[i % len(users)].id, cantidad=1))
+    db.session.commit()
+
+
+def _n_sql(client, url, headers):
+    resp = client.get(url, headers=headers)
+    assert resp.status_code == 200, resp.get_data(as_text=True)
+    return int(resp.headers["X-SQL-Count"])
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_consultas_no_crecen_con_las_filas(client, catalogo, usuarios, admin_headers, url):
+    _movimientos(3, catalogo, usuarios)
+    pocas = _n_sql(client, url, admin_headers)
+
+    _movimientos(40, catalogo, usuarios)
+    muchas = _n_sql(client, url, admin_headers)
+
+    assert muchas == pocas
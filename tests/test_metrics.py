@@ -0,0 +1,21 @@
+"""Métricas Prometheus: /metrics no se expone sin token y la latencia se mide al cerrar la respuesta."""
+from prometheus_client import REGISTRY
+
+
+def _peticiones(route, status="200"):
+    labels = {"method": "GET", "route": route, "status": status}
+    return REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+
+def test_metrics_no_se_expone_sin_token(client):
+    resp = client.get("/metrics")
+    assert b"http_requests_total" not in resp.data  # cae en el fallback de la SPA
+
+
+def test_peticion_se_observa_al_cerrar_la_respuesta(client, catalogo, admin_headers):
+    antes = _peticiones("/api/productos")
+    resp = client.get("/api/productos", headers=admin_headers, buffered=False)
+    assert resp.status_code == 200
+    assert _peticiones("/api/productos") == antes  # cuerpo aún sin enviar
+    resp.close()
+    assert _peticiones("/api/productos") == antes + 1
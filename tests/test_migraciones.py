@@ -0,0 +1,24 @@
+"""Las migraciones crean exactamente el esquema de los modelos: tras un upgrade limpio autogenerate no ve cambios."""
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _flask_db(db_url, *args):
+    env = dict(os.environ, DATABASE_URL=db_url, FLASK_APP="src/app.py",
+               PYTHONPATH=os.path.join(RAIZ, "src"))
+    return subprocess.run([sys.executable, "-m", "flask", "db", *args], cwd=RAIZ, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def test_upgrade_limpio_sin_cambios_pendientes(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'migraciones.db'}"
+    up = _flask_db(db_url, "upgrade")
+    assert up.returncode == 0, up.stderr
+
+    # la tabla FTS5 y sus tablas sombra no cuentan como sobrantes
+    check = _flask_db(db_url, "check")
+    assert check.returncode == 0, check.stderr
+    assert "No new upgrade operations detected" in check.stdout + check.stderr
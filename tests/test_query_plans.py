@@ -0,0 +1,97 @@
+"""
+Plan de las consultas de los listados: cada filtro y orden tiene que estar
+servido por un índice (ni recorrido completo de la tabla ni ordenación en
+un B-tree temporal). Se ejecuta EXPLAIN QUERY PLAN sobre las sentencias que
+lanza de verdad cada petición.
+"""
+import pytest
+
+from api.models import db, Entrada, Salida
+
+
+def _plan(sql, params):
+    filas = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql, tuple(params or ()))
+    return [fila[-1] for fila in filas]
+
+
+def _problemas(sentencias):
+    malos = []
+    for sql, params in sentencias:
+        if not sql.lstrip().upper().startswith("SELECT"):
+            continue
+        for paso in _plan(sql, params):
+            sin_indice = paso.startswith("SCAN") and "INDEX" not in paso
+            if sin_indice or "TEMP B-TREE" in paso:
+                malos.append((paso, sql))
+    return malos
+
+
+@pytest.fixture
+def movimientos(catalogo, usuarios):
+    productos, proveedores = catalogo["productos"], catalogo["proveedores"]
+    users = list(usuarios.values())
+    for i in range(60):
+        db.session.add(Entrada(producto_id=productos[i % 3].id, proveedor_id=proveedores[i % 2].id, cantidad=1))
+        db.session.add(Salida(producto_id=productos[i % 3].id, usuario_id=users[i % 2].id, cantidad=1))
+    db.session.commit()
+
+
+PAGINADOS = [
+    ("admin", "/api/salidas?limit=10"),
+    ("admin", "/api/salidas?limit=10&producto_id=1"),
+    ("admin", "/api/salidas?limit=10&desde=2000-01-01&hasta=2999-12-31"),
+    ("empleado", "/api/salidas?limit=10"),
+    ("admin", "/api/salidas?limit=10&fields=fecha,producto_nombre,cantidad"),
+    ("admin", "/api/registro-salida?limit=10"),
+    ("empleado", "/api/registro-salida?limit=10"),
+    ("admin", "/api/registro-entrada?limit=10"),
+    ("admin", "/api/registro-entrada?limit=10&proveedor_id=1"),
+]
+
+
+@pytest.mark.parametrize("rol,url", PAGINADOS)
+def test_paginas_usan_indice(client, movimientos, admin_headers, empleado_headers, sentencias, rol, url):
+    headers = admin_headers if rol == "admin" else empleado_headers
+    with sentencias() as sql:
+        primera = client.get(url, headers=headers)
+        assert primera.status_code == 200
+        cursor = primera.get_json()["next_cursor"]
+        assert cursor
+        segunda = client.get(f"{url}&cursor={cursor}", headers=headers)
+        assert segunda.status_code == 200
+
+    assert _problemas(sql) == []
+
+
+@pytest.mark.parametrize("url", ["/api/productos", "/api/productos?categoria=Textil"])
+def test_catalogo_usa_indice(client, catalogo, admin_headers, sentencias, url):
+    with sentencias() as sql:
+        assert client.get(url, headers=admin_headers).status_code == 200
+    assert _problemas(sql) == []
+
+
+def test_paginas_recorren_todo_sin_repetir(client, movimientos, admin_headers):
+    # filas con y sin microsegundos, y una con fecha NULL
+    db.session.execute(db.text("UPDATE salida SET fecha = '2024-05-01 10:00:00.000000' WHERE id % 3 = 0"))
+    db.session.execute(db.text("UPDATE salida SET fecha = '2024-05-01 10:00:00.250000' WHERE id % 3 = 1"))
+    db.session.execute(db.text("UPDATE salida SET fecha = NULL WHERE id = 7"))
+    db.session.commit()
+
+    vistos, cursor = [], None
+    while True:
+        url = "/api/salidas?limit=7" + (f"&cursor={cursor}" if cursor else "")
+        resp = client.get(url, headers=admin_headers)
+        assert resp.status_code == 200
+        body = resp.get_json()
+        vistos += [it["id"] for it in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(vistos) == list(range(1, 61))
+    assert len(vistos) == len(set(vistos))
+
+
+def test_cursor_invalido(client, admin_headers, usuarios):
+    resp = client.get("/api/salidas?limit=5&cursor=no-es-un-cursor", headers=admin_headers)
+    assert resp.status_code == 400
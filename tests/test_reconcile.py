@@ -0,0 +1,54 @@
+"""Conciliación de stock_actual con el libro: detección de desviaciones y reparación."""
+from api import reconcile
+from api.models import db, Producto, Salida
+
+
+def _descuadrar(pid, stock):
+    db.session.execute(db.text("UPDATE producto SET stock_actual = :s WHERE id = :id"), {"s": stock, "id": pid})
+    db.session.commit()
+
+
+def test_drift_detecta_stock_descuadrado(app, catalogo, usuarios):
+    p1, p2, p3 = catalogo["productos"]
+    db.session.add(Salida(producto_id=p2.id, usuario_id=usuarios["admin"].id, cantidad=30))
+    db.session.commit()  # libro de p2: 100 - 30, stock_actual sigue en 100
+    _descuadrar(p3.id, 7)
+
+    assert reconcile.drift() == [
+        {"producto_id": p2.id, "nombre": p2.nombre, "stock_actual": 100, "ledger": 70, "diferencia": 30},
+        {"producto_id": p3.id, "nombre": p3.nombre, "stock_actual": 7, "ledger": 100, "diferencia": -93},
+    ]
+
+
+def test_repair_deja_el_stock_igual_al_libro(app, catalogo, sentencias):
+    p1, p2, p3 = catalogo["productos"]
+    _descuadrar(p3.id, 7)
+    _descuadrar(p1.id, 250)
+
+    with sentencias() as sql:
+        assert reconcile.repair() == 2
+
+    # bloqueo de los productos desviados en orden de id antes del UPDATE
+    bloqueo = [i for i, (s, _) in enumerate(sql) if s.startswith("SELECT producto.id") and " IN (" in s]
+    update = [i for i, (s, _) in enumerate(sql) if s.startswith("UPDATE producto")]
+    assert bloqueo and update and bloqueo[-1] < update[0]
+    assert list(sql[bloqueo[-1]][1]) == [p1.id, p3.id]
+
+    db.session.expire_all()
+    assert reconcile.drift() == []
+    assert [p.stock_actual for p in Producto.query.order_by(Producto.id)] == [100, 100, 100]
+
+
+def test_repair_sin_desviaciones_no_escribe(app, catalogo, sentencias):
+    with sentencias() as sql:
+        assert reconcile.repair() == 0
+    assert not [s for s, _ in sql if s.startswith("UPDATE")]
+
+
+def test_conciliacion_post(client, catalogo, admin_headers):
+    p1 = catalogo["productos"][0]
+    _descuadrar(p1.id, 1)
+    resp = client.post("/api/stock/conciliacion", headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.get_json()["corregidos"] == 1
+    assert client.get("/api/stock/conciliacion", headers=admin_headers).get_json()["desviaciones"] == 0
@@ -0,0 +1,71 @@
+"""POST /registro-salida/lote: todo o nada, descuento condicional y un único INSERT."""
+from api.models import db, Producto, Salida, StockDiario
+
+
+def _lote(client, headers, lineas):
+    return client.post("/api/registro-salida/lote", json={"lineas": lineas}, headers=headers)
+
+
+def test_lote_descuenta_stock_y_devuelve_ids(client, catalogo, admin_headers):
+    p1, p2, _ = catalogo["productos"]
+    resp = _lote(client, admin_headers, [
+        {"producto_id": p1.id, "cantidad": 3},
+        {"producto_id": p2.id, "cantidad": 5, "observaciones": "obra"},
+        {"producto_id": p1.id, "cantidad": 2},
+    ])
+    assert resp.status_code == 201, resp.get_json()
+    body = resp.get_json()
+
+    salidas = [db.session.get(Salida, sid) for sid in body["salida_ids"]]
+    assert [(s.producto_id, s.cantidad) for s in salidas] == [(p1.id, 3), (p2.id, 5), (p1.id, 2)]
+    assert salidas[1].observaciones == "obra"
+    assert {p["id"]: p["stock_actual"] for p in body["productos"]} == {p1.id: 95, p2.id: 95}
+    assert db.session.get(Producto, p1.id).stock_actual == 95
+    assert sum(d.salidas for d in StockDiario.query.filter_by(producto_id=p1.id)) == 5
+
+
+def test_lote_un_update_y_un_insert(client, catalogo, admin_headers, sentencias):
+    productos = catalogo["productos"]
+    lineas = [{"producto_id": productos[i % 3].id, "cantidad": 1} for i in range(50)]
+    with sentencias() as sql:
+        assert _lote(client, admin_headers, lineas).status_code == 201
+
+    updates = [params for s, params in sql if s.startswith("UPDATE producto")]
+    assert len(updates) == 1
+    assert [p[1] for p in updates[0]] == sorted(p.id for p in productos)  # executemany en orden de id
+    assert sum(s.startswith("INSERT INTO salida") for s, _ in sql) == 1
+
+
+def test_lote_sin_stock_no_escribe_nada(client, catalogo, admin_headers):
+    p1, p2, _ = catalogo["productos"]
+    resp = _lote(client, admin_headers, [
+        {"producto_id": p1.id, "cantidad": 1},
+        {"producto_id": p2.id, "cantidad": 60},
+        {"producto_id": p2.id, "cantidad": 60},
+        {"producto_id": 999, "cantidad": 1},
+    ])
+    assert resp.status_code == 400
+    assert resp.get_json()["errores"] == [
+        {"linea": 2, "msg": "Stock insuficiente", "disponible": 40},
+        {"linea": 3, "msg": "Producto no existe"},
+    ]
+    db.session.expire_all()
+    assert Salida.query.count() == 0
+    assert [p.stock_actual for p in Producto.query.order_by(Producto.id)] == [100, 100, 100]
+
+
+def test_lote_valida_cada_linea(client, catalogo, admin_headers):
+    p1 = catalogo["productos"][0]
+    resp = _lote(client, admin_headers, [
+        {"producto_id": p1.id, "cantidad": 1, "observaciones": "ok"},
+        {"producto_id": p1.id, "cantidad": 1, "observaciones": 5},
+        {"producto_id": p1.id, "cantidad": "x"},
+        {"producto_id": p1.id, "cantidad": 1, "observaciones": None},
+    ])
+    assert resp.status_code == 400
+    assert resp.get_json()["errores"] == [
+        {"linea": 1, "msg": "observaciones debe ser texto"},
+        {"linea": 2, "msg": "producto_id y cantidad deben ser enteros"},
+    ]
+    db.session.expire_all()
+    assert Salida.query.count() == 0
@@ -0,0 +1,22 @@
+"""flask seed-load: los movimientos solo referencian usuarios y proveedores del propio seed."""
+from sqlalchemy import select
+
+from api import reconcile
+from api.models import db, Entrada, Proveedor, Salida, User
+from api.seed import seed_load
+
+
+def test_seed_usa_los_ids_insertados(app, usuarios):
+    db.session.add(Proveedor(nombre="Proveedor 001"))  # mismo nombre que uno del seed
+    db.session.commit()
+
+    res = seed_load(productos=20, proveedores=5, usuarios=4, salidas=300, entradas=60, log=lambda _: None)
+
+    seed_uids = set(db.session.execute(select(User.id).where(User.email.like("%@seed.sw"))).scalars())
+    seed_provs = set(db.session.execute(select(Proveedor.id).where(Proveedor.contacto.isnot(None))).scalars())
+    assert len(seed_uids) == 4 and len(seed_provs) == 5
+    assert set(db.session.execute(select(Salida.usuario_id).distinct()).scalars()) <= seed_uids
+    provs = set(db.session.execute(select(Entrada.proveedor_id).distinct()).scalars()) - {None}
+    assert provs <= seed_provs
+    assert res["salidas"] == Salida.query.count() == 300
+    assert reconcile.drift() == []
@@ -0,0 +1,92 @@
+"""Stock en una fecha pasada a partir de las fotos de stock_snapshot."""
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api import snapshots
+from api.models import db, Entrada, Salida, StockSnapshot
+
+
+def _ahora():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _preparar(producto, usuario, salidas, fotos, stock_actual):
+    """Libro con la entrada inicial hace 10 días, las salidas y fotos dadas (días atrás)."""
+    ahora = _ahora()
+    Entrada.query.filter_by(producto_id=producto.id).update({"fecha": ahora - timedelta(days=10)})
+    for dias, cantidad in salidas:
+        db.session.add(Salida(producto_id=producto.id, usuario_id=usuario.id, cantidad=cantidad,
+                              fecha=ahora - timedelta(days=dias)))
+    for dias, stock in fotos:
+        db.session.add(StockSnapshot(producto_id=producto.id, fecha=ahora - timedelta(days=dias), stock=stock))
+    producto.stock_actual = stock_actual
+    db.session.commit()
+    return ahora
+
+
+def test_stock_entre_dos_fotos(app, catalogo, usuarios):
+    p = catalogo["productos"][0]
+    ahora = _preparar(p, usuarios["admin"], salidas=[(4.5, 20), (3.6, 3), (2, 10)],
+                      fotos=[(5, 100), (3, 77)], stock_actual=67)
+    hace = lambda dias: ahora - timedelta(days=dias)  # noqa: E731
+
+    # más cerca de la primera foto: replay hacia delante
+    assert snapshots.stock_at(p, hace(4.6))["stock"] == 100
+    r = snapshots.stock_at(p, hace(4.4))
+    assert r["stock"] == 80
+    assert r["desde_snapshot"] == hace(5).isoformat()
+    # más cerca de la segunda: se deshace la salida posterior a 'at'
+    r = snapshots.stock_at(p, hace(3.7))
+    assert r["stock"] == 80
+    assert r["desde_snapshot"] == hace(3).isoformat()
+
+
+def test_stock_despues_de_la_ultima_foto(app, catalogo, usuarios):
+    p = catalogo["productos"][0]
+    ahora = _preparar(p, usuarios["admin"], salidas=[(4.5, 20), (3.6, 3), (2, 10)],
+                      fotos=[(5, 100), (3, 77)], stock_actual=67)
+    hace = lambda dias: ahora - timedelta(days=dias)  # noqa: E731
+
+    assert snapshots.stock_at(p, hace(2.5))["stock"] == 77
+    assert snapshots.stock_at(p, hace(1.9))["stock"] == 67
+    r = snapshots.stock_at(p, hace(0.5))
+    assert r == {"producto_id": p.id, "at": hace(0.5).isoformat(), "stock": 67, "desde_snapshot": "stock_actual"}
+    assert snapshots.stock_at(p, ahora + timedelta(days=1))["stock"] == 67
+
+
+@pytest.fixture
+def zona_no_utc():
+    """Servidor con la hora local fuera de UTC (UTC-5)."""
+    antes = os.environ.get("TZ")
+    os.environ["TZ"] = "Etc/GMT+5"
+    time.tzset()
+    yield
+    if antes is None:
+        os.environ.pop("TZ")
+    else:
+        os.environ["TZ"] = antes
+    time.tzset()
+
+
+def test_stock_at_no_depende_de_la_zona_local(client, catalogo, usuarios, admin_headers, zona_no_utc):
+    p = catalogo["productos"][0]
+    ahora = _preparar(p, usuarios["admin"], salidas=[(1 / 24, 5)], fotos=[], stock_actual=95)
+
+    # hace 2 h es pasado aunque la hora local vaya 5 h por detrás
+    assert snapshots.stock_at(p, ahora - timedelta(hours=2))["stock"] == 100
+    assert snapshots.stock_at(p, ahora - timedelta(minutes=30))["stock"] == 95
+
+    # el mismo instante con zona explícita
+    at = (ahora - timedelta(hours=2)).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(hours=2)))
+    resp = client.get(f"/api/productos/{p.id}/stock", query_string={"at": at.isoformat()}, headers=admin_headers)
+    assert resp.status_code == 200
+    assert resp.get_json()["stock"] == 100
+
+
+def test_take_snapshot_guarda_fecha_con_el_formato_de_los_movimientos(app, catalogo):
+    assert snapshots.take_snapshot() == 3
+    longitudes = db.session.execute(db.text("SELECT DISTINCT length(fecha) FROM stock_snapshot")).scalars().all()
+    assert longitudes == [len("2026-01-01 00:00:00.000000")]
@@ -0,0 +1,26 @@
+"""Instrumentación SQL: una sentencia que falla no deja su inicio en la pila de la conexión."""
+import time
+
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+
+from api import sql_stats
+from api.models import db
+
+
+def test_sentencia_fallida_no_descuadra_la_siguiente(app):
+    with app.test_request_context("/"):
+        g.sql_stats = sql_stats.RequestStats()
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(db.text("SELECT * FROM no_existe"))
+            assert conn.info.get(sql_stats._START_KEY) == []
+
+            time.sleep(0.2)
+            conn.execute(db.text("SELECT 1"))
+            assert conn.info.get(sql_stats._START_KEY) == []
+
+        (elapsed, statement), = g.sql_stats.top()
+        assert statement == "SELECT 1"
+        assert elapsed < 0.1
@@ -0,0 +1,49 @@
+"""GET /productos/suggest: top-k exacto desde el índice en memoria, sin SQL por tecla."""
+from api import suggest
+from api.models import db, Producto
+
+
+def _sugerir(client, headers, q, k=10):
+    resp = client.get(f"/api/productos/suggest?prefix={q}&k={k}", headers=headers)
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_prefijo_corto_prioriza_nombres_sobre_categorias(client, admin_headers):
+    # muchas más claves de categoría que de nombre con la misma inicial
+    db.session.add_all(Producto(nombre=f"Zeta {i:04d}", categoria="Abrillantadores") for i in range(800))
+    db.session.add_all(Producto(nombre=n, categoria="Varios") for n in ("Ácido cítrico", "Ambientador", "Zz aceite"))
+    db.session.commit()
+
+    nombres = [it["nombre"] for it in _sugerir(client, admin_headers, "a", 5)]
+
+    # nombre completo, después palabra del nombre y solo al final categoría
+    assert nombres == ["Ácido cítrico", "Ambientador", "Zz aceite", "Zeta 0000", "Zeta 0001"]
+
+
+def test_sugerencia_no_consulta_la_bd(client, catalogo, admin_headers, sentencias):
+    _sugerir(client, admin_headers, "p")  # primer uso: construye el índice
+    with sentencias() as sql:
+        _sugerir(client, admin_headers, "pr")
+    assert sql == []
+
+
+def test_stock_se_actualiza_tras_una_salida(client, catalogo, admin_headers):
+    p1 = catalogo["productos"][0]
+    antes = {it["id"]: it["stock_actual"] for it in _sugerir(client, admin_headers, p1.nombre)}
+    assert antes[p1.id] == 100
+
+    resp = client.post("/api/registro-salida", json={"producto_id": p1.id, "cantidad": 7}, headers=admin_headers)
+    assert resp.status_code == 201
+
+    despues = {it["id"]: it["stock_actual"] for it in _sugerir(client, admin_headers, p1.nombre)}
+    assert despues[p1.id] == 93
+
+
+def test_indice_caducado_se_sirve_mientras_se_refresca(app, catalogo, monkeypatch):
+    suggest.index.suggest("p")
+    monkeypatch.setattr(suggest.index, "_load", lambda: (_ for _ in ()).throw(AssertionError("en la petición")))
+    monkeypatch.setattr(suggest.index, "_refreshing", True)  # ya hay un refresco en marcha
+    suggest.index.mark_stale()
+
+    assert suggest.index.suggest("p")  # responde con el índice vigente